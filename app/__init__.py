@@ -5,7 +5,6 @@ LoRa Setup Flask Application Factory
 import os
 from flask import Flask
 from app.config.settings import Config
-from app.utils.celery_config import make_celery
 from app.utils.logging_config import setup_logging
 
 def create_app(config_class=Config):
@@ -29,9 +28,11 @@ def create_app(config_class=Config):
     # Setup logging
     setup_logging(app)
     
-    # Initialize Celery
-    celery = make_celery(app)
-    app.celery = celery
+    # Initialize Celery only when enabled (imported lazily to keep startup light)
+    app.celery = None
+    if app.config.get('CELERY_ENABLED', True):
+        from app.utils.celery_config import make_celery
+        app.celery = make_celery(app)
 
     # Register blueprints
     #from app.routes.auth import auth_bp
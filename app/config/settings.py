@@ -10,9 +10,16 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'lora-setup-secret-key-change-in-production'
     
     # Celery Configuration
+    CELERY_ENABLED = os.environ.get('CELERY_ENABLED', 'true').lower() in ('1', 'true', 'yes')
     CELERY_BROKER_URL = os.environ.get('CELERY_BROKER_URL') or 'redis://localhost:6379/0'
     CELERY_RESULT_BACKEND = os.environ.get('CELERY_RESULT_BACKEND') or 'redis://localhost:6379/0'
     
+    # Largest accepted request body (firmware uploads), in bytes
+    MAX_CONTENT_LENGTH = int(os.environ.get('MAX_CONTENT_LENGTH', 16 * 1024 * 1024))
+    
+    # Logging ('full' = console + rotating file, 'minimal' = console only)
+    LOGGING_MODE = os.environ.get('LOGGING_MODE', 'full')
+    
     # Authentication
     VALID_USERNAME = os.environ.get('VALID_USERNAME') or 'demo'
     VALID_PASSWORD = os.environ.get('VALID_PASSWORD') or 'demo'
@@ -3,26 +3,67 @@ Configuration file management models
 """
 
 import configparser
+import contextlib
 import logging
 import os
 import platform
 
+# Import platform-specific file locking
+try:
+    import fcntl  # Unix/Linux/Mac
+    HAS_FCNTL = True
+except ImportError:
+    HAS_FCNTL = False
+    
+try:
+    import msvcrt  # Windows
+    HAS_MSVCRT = True
+except ImportError:
+    HAS_MSVCRT = False
+
 logger = logging.getLogger(__name__)
 
+# Resolved once at import: project root directory (2 levels up from this file) and OS name
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SYSTEM = platform.system()
+logger.debug(f"Project root directory: {PROJECT_ROOT}")
+
+# Ensure directory exists
+os.makedirs(PROJECT_ROOT, exist_ok=True)
+
+
+@contextlib.contextmanager
+def flock(file_handle, shared=False):
+    """Hold an advisory lock on an open file for the duration of the block (cross-platform).
+
+    Shared locks let concurrent readers proceed; msvcrt only has exclusive
+    locks, so on Windows every lock is exclusive.
+    """
+    fd = file_handle.fileno()
+    if HAS_FCNTL:  # Unix/Linux/Mac
+        fcntl.flock(fd, fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+    elif HAS_MSVCRT:  # Windows
+        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+    else:
+        # Fallback: no file locking available
+        yield
+
+
 class ConfigManager:
     """Base configuration manager"""
     
     def __init__(self):
-        self.system = platform.system()
+        self.system = SYSTEM
         self._setup_paths()
     
     def _setup_paths(self):
         """Setup configuration paths based on operating system"""
-        # Get the project root directory (2 levels up from this file)
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        project_root = os.path.dirname(os.path.dirname(current_dir))
-        self.run_dir = project_root
-        logger.debug(f"Project root directory: {self.run_dir}")
-        
-        # Ensure directory exists
-        os.makedirs(self.run_dir, exist_ok=True)
\ No newline at end of file
+        self.run_dir = PROJECT_ROOT
@@ -0,0 +1,39 @@
+"""
+Lightweight INI reader for the hot read path
+
+Parses the simple files written by configparser in this app (``[section]``
+headers and ``key = value`` lines) with two compiled regexes, which is much
+cheaper than a full configparser load. Option names are lower-cased and
+values stripped, matching configparser's defaults.
+
+Not supported: interpolation, multi-line (continuation) values, ``:`` as a
+key/value delimiter, inline comments and DEFAULT-section inheritance. Writes
+still go through configparser, so the on-disk format is unchanged.
+"""
+
+import re
+
+_SECTION_RE = re.compile(r'^\[([^\]\n]+)\][ \t\r]*$', re.M)
+_KV_RE = re.compile(r'^([^=;#\[\s][^=\n]*?)[ \t]*=[ \t]*(.*?)[ \t\r]*$', re.M)
+
+
+def parse(path):
+    """Parse an INI file into a dict of sections.
+
+    Args:
+        path (str): INI file path
+
+    Returns:
+        dict: {section: {option: value}}
+    """
+    with open(path, 'rb') as f:
+        text = f.read().decode('utf-8')
+
+    # split() yields [preamble, name1, body1, name2, body2, ...]
+    parts = _SECTION_RE.split(text)
+    sections = {}
+    for i in range(1, len(parts) - 1, 2):
+        options = sections.setdefault(parts[i], {})
+        for key, value in _KV_RE.findall(parts[i + 1]):
+            options[key.lower()] = value
+    return sections
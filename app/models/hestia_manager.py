@@ -2,336 +2,508 @@
 Module for managing NTN dongle communication.
 """
 import configparser
+import contextlib
+import datetime
 import hashlib
 import logging
 import os
 import threading
 import json
 import time
-import platform
-from app.models.config_manager import ConfigManager
-from time import sleep
-
-# Import platform-specific file locking
-try:
-    import fcntl  # Unix/Linux/Mac
-    HAS_FCNTL = True
-except ImportError:
-    HAS_FCNTL = False
-    
-try:
-    import msvcrt  # Windows
-    HAS_MSVCRT = True
-except ImportError:
-    HAS_MSVCRT = False
+from types import MappingProxyType
+from app.models import fast_ini
+from app.models.config_manager import ConfigManager, flock
 
 logger = logging.getLogger(__name__)
 
+
+def _file_key(path):
+    """Change key for a file: (inode, mtime_ns, size), or None if it is missing"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_ino, st.st_mtime_ns, st.st_size)
+
+
+# Result templates for read_hestia_info: returned key -> default value (read-only)
+_NTN_DEFAULTS = MappingProxyType({
+    'imsi': '',
+    'rsrp': '',
+    'sinr': '',
+    'longitude': '',
+    'latitude': '',
+    'ntn-status': '',
+    'srv_mode': '2',
+    'last-update': ''
+})
+_LORA_DEFAULTS = MappingProxyType({
+    'devAddr': '',
+    'data': '',
+    'rssi': '',
+    'snr': '',
+    'last-update': ''
+})
+_SERIAL_DEFAULTS = MappingProxyType({
+    'serial_interface': '/dev/ttyUSB0'
+})
+
+# Idle upload-worker wait; queue writes in this process wake it immediately,
+# this only bounds the delay for entries appended by other processes
+_QUEUE_IDLE_WAIT = 30  # seconds
+
+# Message log files are trimmed back to the newest entries past this size
+_MESSAGES_FILE_MAX_BYTES = 4096
+# Tail window read when fetching the newest messages (covers a full untrimmed file)
+_MESSAGES_TAIL_BYTES = 2 * _MESSAGES_FILE_MAX_BYTES
+
+
+def _tail_lines(f, size, count):
+    """Last count complete lines of an open binary file of the given size.
+
+    The window starts at _MESSAGES_TAIL_BYTES and doubles until it holds
+    count whole lines, so a long entry is never returned cut in half.
+    """
+    window = _MESSAGES_TAIL_BYTES
+    while True:
+        start = max(0, size - window)
+        f.seek(start)
+        lines = f.read(size - start).splitlines(keepends=True)
+        if start > 0:
+            # The first line may have begun before the window
+            lines = lines[1:]
+        if len(lines) >= count or start == 0:
+            return lines[-count:]
+        window *= 2
+
 """
 Hestia information management
 """
 class HestiaInfoManager(ConfigManager):
-    """Hestia information manager"""
+    """Hestia information manager (process-wide singleton)"""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+    _initialized = False
+
+    def __new__(cls):
+        """Return the shared instance so the parsed-config cache survives across requests"""
+        if cls._instance is None:
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
 
     def __init__(self):
-        super().__init__()
-        self.hestia_info_file = os.path.join(self.run_dir, 'hestia_info.ini')
-        self.temp_queue_file = os.path.join(self.run_dir, 'temp_data_queue.json')
-        self.file_lock = threading.Lock()
-        self.upload_thread = None
-        self.upload_running = False
+        # Already set up: skip the lock on the per-request path
+        if self._initialized:
+            return
+        with self._instance_lock:
+            if self._initialized:
+                return
+            super().__init__()
+            self.hestia_info_file = os.path.join(self.run_dir, 'hestia_info.ini')
+            self.temp_queue_file = os.path.join(self.run_dir, 'temp_data_queue.json')
+            self.downlink_messages_file = os.path.join(self.run_dir, 'downlink_messages.jsonl')
+            self.uplink_messages_file = os.path.join(self.run_dir, 'uplink_messages.jsonl')
+            # Serializes in-process queue writers (an append must not land between
+            # _remove_from_queue's re-read and rename); readers only take a shared flock
+            self.file_lock = threading.RLock()
+            # Lock file held while this process writes the queue (see _queue_write_lock)
+            self._queue_lock_file = None
+            # Set when data is queued (or on stop) to wake the upload worker
+            self._queue_event = threading.Event()
+            # Data entries in the queue file as (file key, count); None until first counted.
+            # Keyed on the file so appends from other processes trigger a recount
+            self._queue_entry_count = None
+            self._messages_lock = threading.Lock()
+            self.upload_thread = None
+            self.upload_running = False
+            self._cached_config = None
+            self._cached_stat = None
+            self._cached_info = None
+            self._cached_info_stat = None
+            # Parsed message lists for the polling path: cache name -> (file key, messages)
+            self._cached_messages = {}
+            # Serializes access to the shared cached ConfigParser and its read-modify-write cycles
+            self._config_lock = threading.RLock()
+            self._initialized = True
+
+    def _stat_key(self):
+        """Cache key for hestia_info.ini: (path, mtime_ns, size), or None if the file is missing"""
+        try:
+            st = os.stat(self.hestia_info_file)
+        except FileNotFoundError:
+            return None
+        # Keyed on the path too, so repointing hestia_info_file never serves a stale parse
+        return (self.hestia_info_file, st.st_mtime_ns, st.st_size)
+
+    def _load_config(self):
+        """Load parsed configuration, reusing the cached copy if the file is unchanged"""
+        stat_key = self._stat_key()
+        if stat_key is None:
+            self._cached_config = None
+            self._cached_stat = None
+            return configparser.ConfigParser(interpolation=None)
+
+        if self._cached_config is not None and stat_key == self._cached_stat:
+            return self._cached_config
+
+        config = configparser.ConfigParser(interpolation=None)
+        config.read(self.hestia_info_file)
+        self._cached_config = config
+        self._cached_stat = stat_key
+        return config
 
     def read_hestia_info(self):
         """Read Hestia information"""
-        config = configparser.ConfigParser()
-        if os.path.exists(self.hestia_info_file):
-            config.read(self.hestia_info_file)
-
-        if 'ntn-info' not in config:
-            config['ntn-info'] = {
-                'imsi': '',
-                'rsrp': '',
-                'sinr': '',
-                'longitude': '',
-                'latitude': '',
-                'ntn-status': '',
-                'last-update': ''
-            }
-            self._save_config(config)
-
-        if 'lora-info' not in config:
-            config['lora-info'] = {
-                'devAddr': '',
-                'data': '',
-                'rssi': '',
-                'snr': '',
-                'last-update': ''
-            }
-            self._save_config(config)
-
-        # Ensure last-update fields exist
-        if 'last-update' not in config['ntn-info']:
-            config['ntn-info']['last-update'] = ''
-            self._save_config(config)
+        with self._config_lock:
+            stat_key = self._stat_key()
+            # Fast path: file unchanged since the last projection
+            if self._cached_info is None or self._cached_info_stat != stat_key:
+                sections = fast_ini.parse(self.hestia_info_file) if stat_key else {}
+                if 'downlink-messages' in sections:
+                    self._migrate_legacy_downlink_messages()
+                    stat_key = self._stat_key()
+                    sections = fast_ini.parse(self.hestia_info_file) if stat_key else {}
+                if not self._has_defaults(sections):
+                    # Fill in missing sections/options through configparser (single write)
+                    config = self._load_config()
+                    if self._add_missing_defaults(config):
+                        self._save_config(config)
+                    sections = {name: config[name] for name in config.sections()}
+                    stat_key = self._cached_stat
+
+                self._cached_info = {
+                    **self._section_values(sections['ntn-info'], _NTN_DEFAULTS),
+                    **self._section_values(sections['serial-config'], _SERIAL_DEFAULTS),
+                    'lora-info': self._section_values(sections['lora-info'], _LORA_DEFAULTS)
+                }
+                self._cached_info_stat = stat_key
+            info = self._cached_info
 
-        if 'last-update' not in config['lora-info']:
-            config['lora-info']['last-update'] = ''
-            self._save_config(config)
+        # Get downlink messages (newest first) and uplink messages (pending queue items)
+        downlink_messages = self._read_recent_messages(self.downlink_messages_file)
+        uplink_messages = self._get_pending_uplink_messages()
 
-        # Ensure serial configuration section exists
-        if 'serial-config' not in config:
-            config['serial-config'] = {
-                'serial_interface': '/dev/ttyUSB0'
-            }
-            self._save_config(config)
+        return {
+            **info,
+            'lora-info': dict(info['lora-info']),
+            'downlink_messages': downlink_messages,
+            'uplink_messages': uplink_messages
+        }
 
-        # Ensure srv_mode section exists
-        if 'srv_mode' not in config['ntn-info']:
-            config['ntn-info']['srv_mode'] = '2'  # Default to UDP mode
-            self._save_config(config)
+    def _migrate_legacy_downlink_messages(self):
+        """Move the messages older versions kept in hestia_info.ini into the JSON-lines log (once)"""
+        config = self._load_config()
+        if not config.has_section('downlink-messages'):
+            return
+        legacy = config['downlink-messages']
+        lines = []
+        # msg_<unix time> keys: sorted is oldest first, the log's order
+        for key in sorted(legacy):
+            value = legacy[key]
+            parts = value.split('|', 2)
+            if len(parts) == 3:  # timestamp|data|length format
+                message = {'timestamp': parts[0], 'data': parts[1],
+                           'length': int(parts[2]) if parts[2].isdigit() else parts[2]}
+            else:
+                message = {'timestamp': 'Unknown', 'data': value, 'length': len(value)}
+            lines.append(json.dumps(message) + '\n')
 
-        # Ensure downlink-messages section exists
-        if 'downlink-messages' not in config:
-            config['downlink-messages'] = {}
-            self._save_config(config)
+        with self._messages_lock:
+            # Messages logged since the upgrade are newer: keep them after the legacy ones
+            # (skipping lines a migration interrupted before the INI save already copied)
+            try:
+                with open(self.downlink_messages_file, 'r') as f:
+                    logged = f.readlines()
+            except FileNotFoundError:
+                logged = []
+            lines = [line for line in lines if line not in logged] + logged
+            tmp_file = self.downlink_messages_file + '.tmp'
+            with open(tmp_file, 'w') as f:
+                f.writelines(lines[-3:])
+            os.replace(tmp_file, self.downlink_messages_file)
+
+        config.remove_section('downlink-messages')
+        self._save_config(config)
+        logger.info("Migrated downlink messages out of hestia_info.ini")
+
+    @staticmethod
+    def _has_defaults(sections):
+        """Check whether parsed sections already hold everything _add_missing_defaults adds"""
+        ntn = sections.get('ntn-info')
+        lora = sections.get('lora-info')
+        return (ntn is not None and lora is not None
+                and 'serial-config' in sections
+                and 'last-update' in ntn and 'srv_mode' in ntn
+                and 'last-update' in lora)
+
+    @staticmethod
+    def _add_missing_defaults(config):
+        """Add missing sections/options to config; returns True if anything was added"""
+        dirty = False
+
+        # Ensure sections exist, seeded from the result templates
+        if 'ntn-info' not in config:
+            config['ntn-info'] = _NTN_DEFAULTS
+            dirty = True
 
-        # Ensure uplink-messages section exists
-        if 'uplink-messages' not in config:
-            config['uplink-messages'] = {}
-            self._save_config(config)
+        if 'lora-info' not in config:
+            config['lora-info'] = _LORA_DEFAULTS
+            dirty = True
 
-        # Get downlink messages
-        downlink_messages = []
-        if 'downlink-messages' in config:
-            # Sort keys in reverse order to get newest messages first
-            for key in sorted(config['downlink-messages'].keys(), reverse=True):
-                message_data = config['downlink-messages'][key]
-                if '|' in message_data:  # timestamp|data|length format
-                    parts = message_data.split('|', 2)
-                    if len(parts) >= 3:
-                        downlink_messages.append({
-                            'timestamp': parts[0],
-                            'data': parts[1],
-                            'length': parts[2]
-                        })
-                else:
-                    # Fallback for other formats
-                    downlink_messages.append({
-                        'timestamp': 'Unknown',
-                        'data': message_data,
-                        'length': len(str(message_data))
-                    })
+        if 'serial-config' not in config:
+            config['serial-config'] = _SERIAL_DEFAULTS
+            dirty = True
 
-        # Get uplink messages (pending queue items)
-        uplink_messages = self._get_pending_uplink_messages()
+        ntn = config['ntn-info']
+        lora = config['lora-info']
 
-        return {
-            'imsi': config['ntn-info'].get('imsi', ''),
-            'rsrp': config['ntn-info'].get('rsrp', ''),
-            'sinr': config['ntn-info'].get('sinr', ''),
-            'longitude': config['ntn-info'].get('longitude', ''),
-            'latitude': config['ntn-info'].get('latitude', ''),
-            'ntn-status': config['ntn-info'].get('ntn-status', ''),
-            'srv_mode': config['ntn-info'].get('srv_mode', '2'),
-            'last-update': config['ntn-info'].get('last-update', ''),
-            'serial_interface': config['serial-config'].get('serial_interface', '/dev/ttyUSB0'),
-            'downlink_messages': downlink_messages[:3],  # Keep only first 3 messages (newest)
-            'uplink_messages': uplink_messages[:3],  # Keep only first 3 messages (newest)
-            'lora-info': {
-                'devAddr': config['lora-info'].get('devAddr', ''),
-                'data': config['lora-info'].get('data', ''),
-                'rssi': config['lora-info'].get('rssi', ''),
-                'snr': config['lora-info'].get('snr', ''),
-                'last-update': config['lora-info'].get('last-update', '')
-            }
-        }
+        # Ensure last-update fields exist
+        if 'last-update' not in ntn:
+            ntn['last-update'] = ''
+            dirty = True
+
+        if 'last-update' not in lora:
+            lora['last-update'] = ''
+            dirty = True
+
+        # Ensure srv_mode exists
+        if 'srv_mode' not in ntn:
+            ntn['srv_mode'] = '2'  # Default to UDP mode
+            dirty = True
+
+        return dirty
+
+    @staticmethod
+    def _section_values(section, defaults):
+        """Project a config section onto a defaults template in one pass"""
+        # fast_ini sections are plain dicts already; only SectionProxy needs materializing
+        values = section if isinstance(section, dict) else dict(section)
+        # ConfigParser lower-cases option names, so match template keys case-insensitively
+        return {key: values.get(key.lower(), default) for key, default in defaults.items()}
+
+    @staticmethod
+    def _serialize_config(config):
+        """Render config in ConfigParser.write()'s format as one string"""
+        parts = []
+        for section in config.sections():
+            parts.append(f"[{section}]\n")
+            for key, value in config.items(section, raw=True):
+                value = str(value).replace('\n', '\n\t')
+                parts.append(f"{key} = {value}\n")
+            parts.append("\n")
+        return ''.join(parts)
 
     def _save_config(self, config):
-        """Save configuration to file"""
-        with open(self.hestia_info_file, 'w') as configfile:
-            config.write(configfile)
-
-    def get_file_hash(self):
-        """Get file hash for change detection"""
-        if not os.path.exists(self.hestia_info_file):
-            return None
-
-        sha256 = hashlib.sha256()
-        with open(self.hestia_info_file, 'rb') as f:
-            while chunk := f.read(8192):
-                sha256.update(chunk)
-        return sha256.hexdigest()
+        """Save configuration to file atomically (write temp file, then rename over target)"""
+        tmp_file = self.hestia_info_file + '.tmp'
+        with open(tmp_file, 'w') as configfile:
+            configfile.write(self._serialize_config(config))
+        os.replace(tmp_file, self.hestia_info_file)
+        self._cached_info = None
+        self._cached_config = config
+        self._cached_stat = self._stat_key()
+
+    def get_info_version(self):
+        """Get a change token covering everything read_hestia_info() returns (e.g. for ETags)"""
+        keys = (_file_key(self.hestia_info_file),
+                _file_key(self.downlink_messages_file),
+                _file_key(self.temp_queue_file))
+        return hashlib.blake2b(repr(keys).encode(), digest_size=8).hexdigest()
 
     def update_serial_interface(self, serial_interface):
         """Update serial interface configuration"""
-        config = configparser.ConfigParser()
-        if os.path.exists(self.hestia_info_file):
-            config.read(self.hestia_info_file)
-
-        # Ensure serial-config section exists
-        if 'serial-config' not in config:
-            config['serial-config'] = {}
+        with self._config_lock:
+            config = self._load_config()
 
-        # Update the serial interface
-        config['serial-config']['serial_interface'] = serial_interface
+            # Ensure serial-config section exists
+            if 'serial-config' not in config:
+                config['serial-config'] = {}
 
-        # Save the updated configuration
-        self._save_config(config)
-        logger.info(f"Serial interface updated to: {serial_interface}")
+            # Skip the rewrite if the value is unchanged
+            if config['serial-config'].get('serial_interface') == serial_interface:
+                return
 
-    def add_downlink_message(self, data, length):
-        """Add a downlink message from dl_callback"""
-        import datetime
-        config = configparser.ConfigParser()
-        if os.path.exists(self.hestia_info_file):
-            config.read(self.hestia_info_file)
+            # Update the serial interface
+            config['serial-config']['serial_interface'] = serial_interface
 
-        # Ensure downlink-messages section exists
-        if 'downlink-messages' not in config:
-            config['downlink-messages'] = {}
+            # Save the updated configuration
+            self._save_config(config)
+        logger.info(f"Serial interface updated to: {serial_interface}")
 
-        # Create timestamp
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    def update_info_sections(self, sections):
+        """Update several sections in one read-modify-write cycle
+
+        Args:
+            sections (dict): Mapping of section name -> {option: value}
+        """
+        with self._config_lock:
+            config = self._load_config()
+
+            dirty = False
+            for section, values in sections.items():
+                # Ensure section exists
+                if section not in config:
+                    config[section] = {}
+                    dirty = True
+                current = config[section]
+                for key, value in values.items():
+                    if current.get(key) != value:
+                        current[key] = value
+                        dirty = True
+
+            # Save the updated configuration only if something changed
+            if dirty:
+                self._save_config(config)
+
+    def _append_message(self, path, message):
+        """Append a message as one JSON line, trimming the file to the newest entries once it grows"""
+        line = (json.dumps(message) + '\n').encode('utf-8')
+        with self._messages_lock:
+            with open(path, 'ab') as f:
+                f.write(line)
+                f.flush()
+                size = f.tell()
+                inode = os.fstat(f.fileno()).st_ino
+
+            # Keep only last 3 messages to prevent file from growing too large
+            if size > _MESSAGES_FILE_MAX_BYTES:
+                with open(path, 'rb') as f:
+                    lines = _tail_lines(f, size, 3)
+                tmp_file = path + '.tmp'
+                with open(tmp_file, 'wb') as f:
+                    f.writelines(lines)
+                os.replace(tmp_file, path)
+
+            # If the cached window was current up to this append, slide it instead of
+            # letting the next poll re-read the file
+            cached = self._cached_messages.get((path, 3))
+            if cached is not None and cached[0][0] == inode and cached[0][2] == size - len(line):
+                self._cached_messages[(path, 3)] = (_file_key(path), [message] + cached[1][:2])
+
+    def _read_recent_messages(self, path, count=3):
+        """Read the newest messages from a JSON-lines file by reading only its tail"""
+        file_key = _file_key(path)
+        if file_key is None:
+            return []
+        cached = self._cached_messages.get((path, count))
+        if cached is not None and cached[0] == file_key:
+            return list(cached[1])
 
-        # Convert data to string if it's bytes
-        if isinstance(data, bytes):
+        try:
+            with open(path, 'rb') as f:
+                size = f.seek(0, os.SEEK_END)
+                lines = _tail_lines(f, size, count)
+        except FileNotFoundError:
+            return []
+
+        messages = []
+        for line in reversed(lines):
             try:
-                data_str = data.decode('utf-8')
-            except:
-                data_str = str(data)
-        else:
-            data_str = str(data)
-
-        # Generate unique key
-        key = f"msg_{int(datetime.datetime.now().timestamp())}"
-
-        # Store message in format: timestamp|data|length
-        config['downlink-messages'][key] = f"{timestamp}|{data_str}|{length}"
+                messages.append(json.loads(line))
+            except ValueError:
+                # Torn write
+                continue
+            if len(messages) >= count:
+                break
+        # Cache only if no append happened since the stat taken before the read: checked under the
+        # appenders' lock, so _append_message can't slide a window that already holds its message
+        with self._messages_lock:
+            if _file_key(path) == file_key:
+                self._cached_messages[(path, count)] = (file_key, messages)
+        return list(messages)
 
-        # Keep only last 3 messages to prevent file from growing too large
-        messages = dict(config['downlink-messages'])
-        if len(messages) > 3:
-            # Remove oldest messages, keep only latest 3
-            oldest_keys = sorted(messages.keys())[:len(messages)-3]
-            for old_key in oldest_keys:
-                del config['downlink-messages'][old_key]
-
-        # Save the updated configuration
-        self._save_config(config)
+    def add_downlink_message(self, data, length):
+        """Add a downlink message from dl_callback"""
+        # Convert data to string if it's bytes (undecodable bytes are replaced, not raised)
+        data_str = data.decode('utf-8', 'replace') if isinstance(data, (bytes, bytearray)) else str(data)
+
+        self._append_message(self.downlink_messages_file, {
+            'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'data': data_str,
+            'length': length
+        })
         logger.info(f"Added downlink message: {data_str[:50]}... ({length} bytes)")
 
     def clear_downlink_messages(self):
         """Clear all downlink messages"""
-        config = configparser.ConfigParser()
-        if os.path.exists(self.hestia_info_file):
-            config.read(self.hestia_info_file)
+        self._clear_message_log(self.downlink_messages_file, 'downlink-messages')
+        logger.info("Cleared all downlink messages")
 
-        # Clear all messages
-        if 'downlink-messages' in config:
-            config.remove_section('downlink-messages')
-            config['downlink-messages'] = {}
+    def _clear_message_log(self, path, legacy_section):
+        """Delete a message log file and the INI section older versions stored messages in"""
+        with self._messages_lock:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
 
-        # Save the updated configuration
-        self._save_config(config)
-        logger.info("Cleared all downlink messages")
+        with self._config_lock:
+            config = self._load_config()
+            if config.remove_section(legacy_section):
+                self._save_config(config)
 
     def clear_uplink_messages(self):
         """Clear all uplink messages"""
-        config = configparser.ConfigParser()
-        if os.path.exists(self.hestia_info_file):
-            config.read(self.hestia_info_file)
-
-        # Clear all messages
-        if 'uplink-messages' in config:
-            config.remove_section('uplink-messages')
-            config['uplink-messages'] = {}
-
-        # Save the updated configuration
-        self._save_config(config)
+        self._clear_message_log(self.uplink_messages_file, 'uplink-messages')
         logger.info("Cleared all uplink messages")
 
     def add_uplink_message(self, data, success, message_type='Auto'):
         """Add an uplink message"""
-        import datetime
-        config = configparser.ConfigParser()
-        if os.path.exists(self.hestia_info_file):
-            config.read(self.hestia_info_file)
-
-        # Ensure uplink-messages section exists
-        if 'uplink-messages' not in config:
-            config['uplink-messages'] = {}
-
-        # Create timestamp
-        timestamp = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-
         # Convert data to string if needed
-        if isinstance(data, dict):
-            data_str = json.dumps(data)
-        else:
-            data_str = str(data)
-
-        # Generate unique key
-        key = f"msg_{int(datetime.datetime.now().timestamp())}"
-
-        # Store message in format: timestamp|data|success|type
-        config['uplink-messages'][key] = f"{timestamp}|{data_str}|{success}|{message_type}"
-
-        # Keep only last 3 messages to prevent file from growing too large
-        messages = dict(config['uplink-messages'])
-        if len(messages) > 3:
-            # Remove oldest messages, keep only latest 3
-            oldest_keys = sorted(messages.keys())[:len(messages)-3]
-            for old_key in oldest_keys:
-                del config['uplink-messages'][old_key]
-
-        # Save the updated configuration
-        self._save_config(config)
+        data_str = json.dumps(data) if isinstance(data, dict) else str(data)
+
+        self._append_message(self.uplink_messages_file, {
+            'timestamp': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'data': data_str,
+            'success': success,
+            'type': message_type
+        })
         logger.info(f"Added uplink message: {data_str[:50]}... Success: {success} Type: {message_type}")
 
     def _get_pending_uplink_messages(self):
         """Get the oldest 3 pending messages from temp_data_queue.json"""
         uplink_messages = []
         try:
-            if not os.path.exists(self.temp_queue_file):
+            file_key = _file_key(self.temp_queue_file)
+            if file_key is None:
                 return uplink_messages
+            cached = self._cached_messages.get('pending-uplink')
+            if cached is not None and cached[0] == file_key:
+                return list(cached[1])
+
+            loads = json.loads
+            with open(self.temp_queue_file, 'r') as f, flock(f, shared=True):
+                # Stream the file and stop at the 3rd message instead of reading the whole queue
+                current_comment = None
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    if line.startswith('//'):
+                        # Extract timestamp from comment
+                        if 'at ' in line:
+                            current_comment = line.split('at ', 1)[1]
+                        continue
 
-            with self.file_lock:
-                with open(self.temp_queue_file, 'r') as f:
-                    if self._acquire_file_lock(f):
-                        lines = f.readlines()
-                        self._release_file_lock(f)
-                    else:
-                        return uplink_messages
-
-            # Parse messages and comments
-            current_comment = None
-            message_count = 0
-
-            for line in lines:
-                line = line.strip()
-                if line.startswith('//'):
-                    # Extract timestamp from comment
-                    if 'at ' in line:
-                        timestamp_part = line.split('at ', 1)[1]
-                        current_comment = timestamp_part
-                elif line and not line.startswith('//'):
                     # This is a data line
                     try:
-                        data = json.loads(line)
-                        uplink_messages.append({
-                            'timestamp': current_comment or 'Unknown',
-                            'data': json.dumps(data),
-                            'status': 'Pending',
-                            'position': message_count + 1
-                        })
-                        message_count += 1
-
-                        # Only get first 3 (oldest)
-                        if message_count >= 3:
-                            break
-
+                        data = loads(line)
                     except json.JSONDecodeError:
                         continue
+                    uplink_messages.append({
+                        'timestamp': current_comment or 'Unknown',
+                        'data': json.dumps(data),
+                        'status': 'Pending',
+                        'position': len(uplink_messages) + 1
+                    })
+
+                    # Only get first 3 (oldest)
+                    if len(uplink_messages) >= 3:
+                        break
+            self._cached_messages['pending-uplink'] = (file_key, list(uplink_messages))
 
         except Exception as e:
             logger.error(f"Error reading pending uplink messages: {e}")
@@ -340,8 +512,6 @@ class HestiaInfoManager(ConfigManager):
 
     def capture_location_data(self):
         """Capture current RSRP, SINR, Longitude, Latitude and append to file"""
-        import datetime
-        import json
 
         try:
             # Read current hestia info
@@ -397,13 +567,8 @@ class HestiaInfoManager(ConfigManager):
 
             logger.info(f"Location data captured: {capture_data} -> {filename}")
 
-            # Count total captures in file
-            try:
-                with open(filepath, 'r') as f:
-                    lines = f.readlines()
-                capture_count = sum(1 for line in lines if line.strip().startswith('{"m":'))
-            except:
-                capture_count = 1
+            # Count total entries pending in the queue (tracked, no file scan)
+            capture_count = self._queue_size()
 
             return {
                 'success': True,
@@ -421,8 +586,6 @@ class HestiaInfoManager(ConfigManager):
 
     def auto_capture_from_downlink(self, dl_data):
         """Auto-capture location data triggered by downlink message with specific keys"""
-        import datetime
-        import json
 
         try:
             # Create the data structure for downlink trigger
@@ -444,106 +607,163 @@ class HestiaInfoManager(ConfigManager):
         except Exception as e:
             logger.error(f"Error auto-capturing downlink data: {str(e)}")
 
-    def _acquire_file_lock(self, file_handle):
-        """Acquire file lock for safe file operations (cross-platform)"""
-        try:
-            if HAS_FCNTL:  # Unix/Linux/Mac
-                fcntl.flock(file_handle.fileno(), fcntl.LOCK_EX)
-                return True
-            elif HAS_MSVCRT:  # Windows
-                # Try to lock the file using Windows-specific method
-                msvcrt.locking(file_handle.fileno(), msvcrt.LK_LOCK, 1)
-                return True
-            else:
-                # Fallback: no file locking available
-                logger.warning("No file locking mechanism available on this platform")
-                return True
-        except Exception as e:
-            logger.error(f"Error acquiring file lock: {e}")
-            return False
+    @contextlib.contextmanager
+    def _queue_write_lock(self):
+        """Hold file_lock and an exclusive flock serializing queue writers across processes.
 
-    def _release_file_lock(self, file_handle):
-        """Release file lock (cross-platform)"""
-        try:
-            if HAS_FCNTL:  # Unix/Linux/Mac
-                fcntl.flock(file_handle.fileno(), fcntl.LOCK_UN)
-            elif HAS_MSVCRT:  # Windows
-                # Try to unlock the file using Windows-specific method
-                msvcrt.locking(file_handle.fileno(), msvcrt.LK_UNLCK, 1)
-            # If no locking mechanism available, do nothing
-        except Exception as e:
-            logger.error(f"Error releasing file lock: {e}")
+        The flock is taken on a separate lock file: the queue file itself is
+        replaced on every rewrite, and a lock on the old inode protects nothing.
+        Nested calls from the same thread reuse the lock already held.
+        """
+        with self.file_lock:
+            if self._queue_lock_file is not None:
+                yield
+                return
+            with open(self.temp_queue_file + '.lock', 'a') as lock_file, flock(lock_file):
+                self._queue_lock_file = lock_file
+                try:
+                    yield
+                finally:
+                    self._queue_lock_file = None
 
     def _write_to_queue_file(self, data_line, timestamp_comment):
         """Thread-safe write to queue file"""
-        with self.file_lock:
+        with self._queue_write_lock():
             try:
-                with open(self.temp_queue_file, 'a') as f:
-                    if self._acquire_file_lock(f):
-                        f.write(f"// {timestamp_comment}\n")
-                        f.write(data_line + "\n")
-                        self._release_file_lock(f)
-                        return True
-                    else:
-                        logger.error("Could not acquire file lock for writing")
-                        return False
+                # Locked: an append must not land between another writer's re-read and rename
+                payload = f"// {timestamp_comment}\n{data_line}\n".encode('utf-8')
+                counted = self._queue_entry_count
+                if counted is not None and counted[0] != _file_key(self.temp_queue_file):
+                    counted = None
+                fd = os.open(self.temp_queue_file, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+                try:
+                    os.write(fd, payload)
+                finally:
+                    os.close(fd)
+                # Still exact if it matched the file just before this append
+                if counted is not None:
+                    self._queue_entry_count = (_file_key(self.temp_queue_file), counted[1] + 1)
+                # Wake the upload worker
+                self._queue_event.set()
+                return True
             except Exception as e:
                 logger.error(f"Error writing to queue file: {e}")
                 return False
 
-    def _read_and_process_queue(self):
-        """Read first data entry from queue and return it"""
-        with self.file_lock:
-            try:
-                if not os.path.exists(self.temp_queue_file):
-                    return None, []
+    def _read_queue_lines(self):
+        """Read all lines of the queue file under a shared lock"""
+        if not os.path.exists(self.temp_queue_file):
+            return []
 
-                with open(self.temp_queue_file, 'r') as f:
-                    if self._acquire_file_lock(f):
-                        lines = f.readlines()
-                        self._release_file_lock(f)
-                    else:
-                        logger.error("Could not acquire file lock for reading")
-                        return None, []
-
-                if not lines:
-                    return None, []
-
-                # Find first data line (not comment)
-                for i, line in enumerate(lines):
-                    line = line.strip()
-                    if line and not line.startswith('//'):
-                        try:
-                            data = json.loads(line)
-                            # Return data and remaining lines
-                            remaining_lines = lines[:i] + lines[i+1:]
-                            return data, remaining_lines
-                        except json.JSONDecodeError:
-                            logger.error(f"Invalid JSON in queue file: {line}")
-                            continue
-
-                return None, lines
+        with open(self.temp_queue_file, 'r') as f, flock(f, shared=True):
+            return f.readlines()
 
+    def _drain_queue(self, max_batch=16):
+        """Read up to max_batch data entries from the front of the queue.
+
+        Returns:
+            list: (data, raw_line) tuples in queue order
+        """
+        entries = []
+        try:
+            for raw_line in self._read_queue_lines():
+                line = raw_line.strip()
+                if not line or line.startswith('//'):
+                    continue
+                try:
+                    entries.append((json.loads(line), raw_line))
+                except json.JSONDecodeError:
+                    logger.error(f"Invalid JSON in queue file: {line}")
+                    continue
+                if len(entries) >= max_batch:
+                    break
+        except Exception as e:
+            logger.error(f"Error reading queue file: {e}")
+        return entries
+
+    def _remove_from_queue(self, sent_lines):
+        """Drop sent entries from the queue file with a single rewrite.
+
+        The file is re-read under the queue write lock so entries appended
+        while the batch was being sent are kept.
+        """
+        if not sent_lines:
+            return True
+        with self._queue_write_lock():
+            try:
+                lines = self._read_queue_lines()
             except Exception as e:
                 logger.error(f"Error reading queue file: {e}")
-                return None, []
+                return False
+            pending = list(sent_lines)
+            remaining_lines = []
+            for line in lines:
+                if pending and line == pending[0]:
+                    pending.pop(0)
+                    continue
+                remaining_lines.append(line)
+            return self._update_queue_file(remaining_lines)
 
     def _update_queue_file(self, remaining_lines):
-        """Update queue file with remaining lines after successful send"""
-        with self.file_lock:
+        """Update queue file with remaining lines after successful send.
+
+        The new content is written to a temp file and renamed over the queue
+        file, so readers never see a truncated queue and a crash mid-write
+        leaves the old queue intact.
+        """
+        tmp_file = self.temp_queue_file + '.tmp'
+        with self._queue_write_lock():
             try:
-                with open(self.temp_queue_file, 'w') as f:
-                    if self._acquire_file_lock(f):
-                        f.writelines(remaining_lines)
-                        self._release_file_lock(f)
-                        return True
-                    else:
-                        logger.error("Could not acquire file lock for updating")
-                        return False
+                fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                try:
+                    os.write(fd, ''.join(remaining_lines).encode('utf-8'))
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+                os.replace(tmp_file, self.temp_queue_file)
+                self._queue_entry_count = (_file_key(self.temp_queue_file),
+                                           self._count_queue_entries(remaining_lines))
+                return True
             except Exception as e:
                 logger.error(f"Error updating queue file: {e}")
                 return False
 
+    @staticmethod
+    def _count_queue_entries(lines):
+        """Count data (non-comment, non-blank) lines in queue file content"""
+        count = 0
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith('//'):
+                count += 1
+        return count
+
+    def _queue_size(self):
+        """Number of entries in the queue file, recounted whenever the file changed behind the writers' back"""
+        with self.file_lock:
+            file_key = _file_key(self.temp_queue_file)
+            counted = self._queue_entry_count
+            if counted is not None and counted[0] == file_key:
+                return counted[1]
+            try:
+                with open(self.temp_queue_file, 'r') as f:
+                    count = self._count_queue_entries(f)
+            except FileNotFoundError:
+                count = 0
+            # Keyed on the stat taken before the read: a concurrent append forces another recount
+            self._queue_entry_count = (file_key, count)
+            return count
+
+    def clear_upload_queue(self):
+        """Delete all pending entries from the upload queue file"""
+        with self._queue_write_lock():
+            try:
+                os.remove(self.temp_queue_file)
+            except FileNotFoundError:
+                pass
+            self._queue_entry_count = (None, 0)
+        logger.info("Cleared upload queue")
+
     def start_upload_thread(self, hestia_instance):
         """Start background thread to process upload queue"""
         if not self.upload_running:
@@ -556,6 +776,7 @@ class HestiaInfoManager(ConfigManager):
     def stop_upload_thread(self):
         """Stop background upload thread"""
         self.upload_running = False
+        self._queue_event.set()
         if self.upload_thread and self.upload_thread.is_alive():
             self.upload_thread.join(timeout=5)
         logger.info("Upload thread stopped")
@@ -566,50 +787,34 @@ class HestiaInfoManager(ConfigManager):
 
         while self.upload_running:
             try:
+                # Clear before reading so a write that lands mid-read still wakes us
+                self._queue_event.clear()
+
                 # Check if queue file has data
-                data, remaining_lines = self._read_and_process_queue()
+                entries = self._drain_queue()
 
-                if data is None:
-                    # No data to process, wait before checking again
-                    time.sleep(5)
+                if not entries:
+                    # No data to process, sleep until a write is queued (or the fallback poll)
+                    self._queue_event.wait(_QUEUE_IDLE_WAIT)
                     continue
 
-                logger.info(f"Processing queue data: {data}")
-
-                # Check module status and upload availability before sending
                 if hasattr(self.hestia_instance, 'send_data'):
+                    # Check module status once per batch rather than once per entry
+                    if not self._module_ready():
+                        time.sleep(10)
+                        continue
+
+                    # Send the batch in order, then remove everything that went out with one rewrite
+                    sent_lines = []
                     try:
-                        # Check if module is ready
-                        module_status = self.hestia_instance.module_status()
-                        if not module_status or not module_status.get('all_ready', False):
-                            logger.warning(f"Module not ready for transmission: {module_status}")
-                            time.sleep(10)
-                            continue
-
-                        # Check if upload is available
-                        if not self.hestia_instance.is_upload_available():
-                            logger.warning(f"Upload not available, waiting...")
-                            time.sleep(10)
-                            continue
-
-                        # All checks passed, attempt to send data
-                        logger.info(f"Module ready and upload available, sending data: {data}")
-                        success = self.hestia_instance.send_data(data)
-
-                        if success:
-                            logger.info(f"Successfully sent data: {data}")
-                            # Add to uplink messages log
-                            self.add_uplink_message(data, True, 'Auto')
-                            # Remove the sent data from queue file
-                            self._update_queue_file(remaining_lines)
-                        else:
-                            logger.warning(f"Failed to send data: {data}, will retry later")
-                            # Add failed uplink to log
-                            self.add_uplink_message(data, False, 'Auto')
-                            # Wait before retrying
-                            time.sleep(10)
-                    except Exception as e:
-                        logger.error(f"Error sending data: {e}")
+                        for data, raw_line in entries:
+                            if not self.upload_running or not self._send_queued_data(data):
+                                break
+                            sent_lines.append(raw_line)
+                    finally:
+                        self._remove_from_queue(sent_lines)
+                    if len(sent_lines) < len(entries) and self.upload_running:
+                        # Wait before retrying the unsent entries
                         time.sleep(10)
                 else:
                     logger.error("Hestia instance does not have send_data method")
@@ -620,3 +825,39 @@ class HestiaInfoManager(ConfigManager):
                 time.sleep(10)
 
         logger.info("Upload worker thread stopped")
+
+    def _module_ready(self):
+        """Check that the NTN module is ready for transmission"""
+        try:
+            module_status = self.hestia_instance.module_status()
+        except Exception as e:
+            logger.error(f"Error reading module status: {e}")
+            return False
+        if not module_status or not module_status.get('all_ready', False):
+            logger.warning(f"Module not ready for transmission: {module_status}")
+            return False
+        return True
+
+    def _send_queued_data(self, data):
+        """Send one queue entry if upload is available; returns True if it was uplinked"""
+        logger.info(f"Processing queue data: {data}")
+        try:
+            # Check if upload is available
+            if not self.hestia_instance.is_upload_available():
+                logger.warning(f"Upload not available, waiting...")
+                return False
+
+            # All checks passed, attempt to send data
+            logger.info(f"Module ready and upload available, sending data: {data}")
+            success = self.hestia_instance.send_data(data)
+        except Exception as e:
+            logger.error(f"Error sending data: {e}")
+            return False
+
+        if success:
+            logger.info(f"Successfully sent data: {data}")
+        else:
+            logger.warning(f"Failed to send data: {data}, will retry later")
+        # Add to uplink messages log
+        self.add_uplink_message(data, success, 'Auto')
+        return success
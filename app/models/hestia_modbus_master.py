@@ -6,7 +6,7 @@ NTN devices over Modbus RTU protocol.
 """
 
 import binascii
-import json
+import functools
 import logging
 import modbus_tk
 import modbus_tk.defines as cst
@@ -20,6 +20,45 @@ from time import sleep, time
 MODULE_NAME = os.path.basename(__file__).rsplit('.', 1)[0]
 logger = logging.getLogger(MODULE_NAME)
 
+# Shortest Modbus response timeout (seconds)
+RESPONSE_TIMEOUT_MIN = 0.2
+
+# PCIe2 (LoRa module) AT command registers
+PCIE2_CMD_START = 0xC700
+PCIE2_DATA_LEN = 0xF460
+PCIE2_DATA_START = 0xF461
+PCIE2_MOD_LEN = 0xF860
+PCIE2_MOD_START = 0xF861
+
+# Per-command response handling, looked up by full command and then by the
+# AT+BISGET= prefix: (length register, data start register, wait seconds,
+# response is hex between double quotes, data registers read together with the length)
+# The AT+BISGET= entry keeps what hestia.pcie2_cmd did, since every command goes
+# through it: any AT+BISGET= command (not only AT+BISGET=?) and a 1 s wait. The
+# master's own copy (exact AT+BISGET=?, 3 s wait) had no callers.
+PCIE2_BISGET = 'AT+BISGET='
+PCIE2_PROFILES = {
+    PCIE2_BISGET: (PCIE2_DATA_LEN, PCIE2_DATA_START, 1, True, 48),
+    'ATZ': (PCIE2_MOD_LEN, PCIE2_MOD_START, 5, False, 16),
+}
+PCIE2_DEFAULT_PROFILE = (PCIE2_MOD_LEN, PCIE2_MOD_START, 3, False, 16)
+
+@functools.lru_cache(maxsize=128)
+def _be_u16(count):
+    """ Precompiled packer for `count` big-endian 16-bit registers """
+    return struct.Struct(f'>{count}H')
+
+class _PendingRead:
+    """ A register read queued for the bus that later identical reads can wait on """
+    __slots__ = ('started', 'done', 'values', 'error')
+
+    def __init__(self):
+        self.started = False
+        self.done = threading.Event()
+        self.values = None
+        self.error = None
+
+
 class HestiaModbusMaster:
     """
     NTN Modbus Master class for communicating with NTN devices.
@@ -27,6 +66,10 @@ class HestiaModbusMaster:
     This class provides methods to read/write registers, send AT commands,
     and handle data conversion for NTN Modbus devices.
     """
+
+    # Open masters shared per serial port: port -> [master, number of users]
+    _instances = {}
+    _instances_lock = threading.Lock()
     
     def __init__(self, slave_address, port, baudrate=115200, bytesize=8, parity='N', stopbits=1, xonxoff=0, lock=None, verbose=False):
         """
@@ -42,28 +85,149 @@ class HestiaModbusMaster:
             xonxoff (int): Serial xonxoff (default: 0)
         """
         try:
-            self.master = modbus_rtu.RtuMaster(
-                serial.Serial(
-                    port=port, 
-                    baudrate=baudrate, 
-                    bytesize=bytesize, 
-                    parity=parity, 
-                    stopbits=stopbits, 
-                    xonxoff=xonxoff
-                )
+            ser = serial.Serial(
+                port=port, 
+                baudrate=baudrate, 
+                bytesize=bytesize, 
+                parity=parity, 
+                stopbits=stopbits, 
+                xonxoff=xonxoff
             )
-            self.master.set_timeout(1)
+            self._enable_low_latency(ser)
+            self.port = port
+            self._serial = ser
+            # RtuMaster (modbus-tk >= 1.1) reads the whole expected response frame in one
+            # serial.read() call, so no per-byte receive patching is needed here
+            self.master = modbus_rtu.RtuMaster(ser)
+            # Response timeout scaled to the time needed to receive 256 bytes at this
+            # baud rate, with a floor that leaves room for the slave's turnaround
+            self.master.set_timeout(max(RESPONSE_TIMEOUT_MIN, 256 * 11 / baudrate))
             self.master.set_verbose(False)
             self.slave_addr = slave_address
+            # Read the PCIe2 response length and data in one transaction (until the dongle rejects it)
+            self._pcie2_prefetch = True
             if lock:
                 self.lock = lock
             else:
                 self.lock = threading.Lock()
+            # Reads waiting for the bus, so identical ones can share a transaction:
+            # (functioncode, reg, num) -> _PendingRead
+            self._pending_reads = {}
+            self._pending_lock = threading.Lock()
             logger.info('NTN dongle initialized successfully!')
         except modbus_tk.modbus.ModbusError as e:
             logger.error(f'{e} - Code={e.get_exception_code()}')
             raise
 
+    @classmethod
+    def acquire(cls, port, **kwargs):
+        """
+        Get the master for a serial port, opening the port only if no one holds it yet.
+        
+        Everyone talking to the same dongle shares one port and one bus lock, so
+        transactions can't interleave. The settings of the first caller are used
+        while the port stays open. Pair every call with release().
+        
+        Args:
+            port (str): Serial port path (e.g., '/dev/ttyUSB0')
+            **kwargs: Other HestiaModbusMaster() arguments
+            
+        Returns:
+            HestiaModbusMaster: Shared master for the port
+        """
+        with cls._instances_lock:
+            entry = cls._instances.get(port)
+            if entry is None:
+                entry = cls._instances[port] = [cls(port=port, **kwargs), 0]
+            entry[1] += 1
+            return entry[0]
+
+    def release(self):
+        """ Drop one user of the shared master; the last one closes the serial port """
+        with self._instances_lock:
+            entry = self._instances.get(self.port)
+            if entry is not None and entry[0] is self:
+                entry[1] -= 1
+                if entry[1] > 0:
+                    return
+                del self._instances[self.port]
+        with self.lock:
+            self.master.close()
+            if self._serial.is_open:
+                self._serial.close()
+        logger.info(f'Serial port {self.port} closed')
+
+    def reopen(self):
+        """ Close and reopen the serial port, e.g. after the dongle stopped answering """
+        with self.lock:
+            self.master.close()
+            if self._serial.is_open:
+                self._serial.close()
+            self._serial.open()
+            self._enable_low_latency(self._serial)
+        logger.info(f'Serial port {self.port} reopened')
+
+    @staticmethod
+    def _enable_low_latency(ser):
+        """
+        Set ASYNC_LOW_LATENCY on the serial port so the driver delivers received
+        bytes immediately (USB-serial adapters otherwise buffer them for ~16 ms,
+        which is added to every Modbus round-trip).
+        
+        Args:
+            ser (serial.Serial): Open serial port
+        """
+        # Only pyserial's POSIX backend supports this (TIOCGSERIAL/TIOCSSERIAL)
+        if not hasattr(ser, 'set_low_latency_mode'):
+            return
+        try:
+            ser.set_low_latency_mode(True)
+            logger.info(f'Low latency mode enabled on {ser.port}')
+        except (OSError, ValueError) as e:
+            logger.debug(f'Low latency mode not available on {ser.port}: {e}')
+
+    def _read(self, functioncode, reg, num):
+        """
+        Execute a register read, sharing the transaction with identical concurrent reads.
+        
+        A read that arrives while the same (functioncode, reg, num) read is still
+        waiting for the bus lock takes that read's result instead of queueing a
+        second transaction. Once a read is on the wire it is not joined, so a
+        caller never gets values sampled before it asked.
+        
+        Returns:
+            tuple: Register values (raises on Modbus/serial errors)
+        """
+        key = (functioncode, reg, num)
+        with self._pending_lock:
+            pending = self._pending_reads.get(key)
+            if pending is not None and not pending.started:
+                leader = False
+            else:
+                pending = self._pending_reads[key] = _PendingRead()
+                leader = True
+
+        if not leader:
+            pending.done.wait()
+            if pending.error is not None:
+                raise pending.error
+            return pending.values
+
+        try:
+            with self.lock:
+                with self._pending_lock:
+                    pending.started = True
+                pending.values = self.master.execute(self.slave_addr, functioncode, reg, num)
+            return pending.values
+        except Exception as e:
+            pending.error = e
+            raise
+        finally:
+            with self._pending_lock:
+                if self._pending_reads.get(key) is pending:
+                    del self._pending_reads[key]
+            pending.done.set()
+
     def read_register(self, reg, functioncode=cst.READ_INPUT_REGISTERS):
         """
         Read a single register from the device.
@@ -75,15 +239,13 @@ class HestiaModbusMaster:
         Returns:
             int or None: Register value or None if error
         """
-        with self.lock:
-            try:
-                value = self.master.execute(self.slave_addr, functioncode, reg, 1)
-                return value[0]
-            except Exception as e:
-                logger.info(e)
-                return None
+        try:
+            return self._read(functioncode, reg, 1)[0]
+        except Exception as e:
+            logger.debug(e)
+            return None
 
-    def read_registers(self, reg, num, functioncode=cst.READ_INPUT_REGISTERS):
+    def read_registers(self, reg, num, functioncode=cst.READ_INPUT_REGISTERS, zero_as_none=True):
         """
         Read multiple registers from the device.
         
@@ -91,19 +253,21 @@ class HestiaModbusMaster:
             reg (int): Starting register address
             num (int): Number of registers to read
             functioncode (int): Modbus function code
+            zero_as_none (bool): Treat an all-zero response as "no data" (default: True).
+                Pass False when the caller already knows data is there, e.g. the
+                length came from a length register, so a zero payload is kept.
             
         Returns:
             list or None: List of register values or None if error
         """
-        with self.lock:
-            try:
-                values = self.master.execute(self.slave_addr, functioncode, reg, num)
-                if all(x == 0 for x in values):
-                    return None
-                return values
-            except Exception as e:
-                logger.info(e)
-                return None
+        try:
+            values = self._read(functioncode, reg, num)
+        except Exception as e:
+            logger.debug(e)
+            return None
+        if zero_as_none and not any(values):
+            return None
+        return values
 
     def set_register(self, reg, val):
         """
@@ -116,16 +280,15 @@ class HestiaModbusMaster:
         Returns:
             bool: True if successful, False otherwise
         """
-        with self.lock:
-            try:
-                if val is not None:
-                    value=self.master.execute(self.slave_addr, cst.WRITE_SINGLE_REGISTER, reg, output_value=val)
-                    return True
-                else:
-                    return False
-            except Exception as e:
-                logger.info(e)
-                return False
+        if val is None:
+            return False
+        try:
+            with self.lock:
+                self.master.execute(self.slave_addr, cst.WRITE_SINGLE_REGISTER, reg, output_value=val)
+            return True
+        except Exception as e:
+            logger.debug(e)
+            return False
         
     def set_registers(self, reg, val):
         """
@@ -138,41 +301,52 @@ class HestiaModbusMaster:
         Returns:
             bool: True if successful, False otherwise
         """
-        with self.lock:
-            try:
-                if val is not None:
-                    self.master.execute(self.slave_addr, cst.WRITE_MULTIPLE_REGISTERS, reg, output_value=val)
-                    return True
-                else:
-                    return False
-            except Exception as e:
-                logger.info(e)
-                return False
+        if val is None:
+            return False
+        try:
+            with self.lock:
+                self.master.execute(self.slave_addr, cst.WRITE_MULTIPLE_REGISTERS, reg, output_value=val)
+            return True
+        except Exception as e:
+            logger.debug(e)
+            return False
 
     @staticmethod
-    def modbus_data_to_string(modbus_data):
+    def registers_to_bytes(modbus_data):
+        """
+        Convert Modbus register values to big-endian bytes.
+        
+        Args:
+            modbus_data (list): List of Modbus register values
+            
+        Returns:
+            bytes: Two bytes per register
+        """
+        return _be_u16(len(modbus_data)).pack(*modbus_data)
+
+    @staticmethod
+    def modbus_data_to_string(modbus_data, encoding='utf-8', strip_nul=False):
         """
         Convert Modbus data to string.
         
         Args:
             modbus_data (list): List of Modbus register values
+            encoding (str): Text encoding (default: 'utf-8'); pass 'ascii' for
+                the fixed-width ASCII fields, which decodes faster
+            strip_nul (bool): Strip trailing NUL padding before decoding
             
         Returns:
             str or None: Decoded string or None if error
         """
         try:
-            byte_data = b''.join(struct.pack('>H', value) for value in modbus_data)
-            return byte_data.decode('utf-8')
+            buf = HestiaModbusMaster.registers_to_bytes(modbus_data)
+            if strip_nul:
+                buf = buf.rstrip(b'\x00')
+            return buf.decode(encoding)
         except (UnicodeDecodeError, struct.error) as e:
             logger.error(f"Error decoding Modbus data: {e}")
             return None
 
-    @staticmethod
-    def _bytes_to_integers(byte_list):
-        """Convert list of bytes to integers."""
-        logger.info(f'byte_list: {byte_list}')
-        return [int.from_bytes(b, byteorder='big') for b in byte_list]
-
     @staticmethod
     def bytes_to_list_with_padding(data):
         """
@@ -182,36 +356,30 @@ class HestiaModbusMaster:
             data (bytes): Input byte data
             
         Returns:
-            list: List of integers
+            tuple: Register values (the Modbus master accepts any sequence)
         """
-        chunks = [data[i:i+2] for i in range(0, len(data), 2)]
-        if len(chunks[-1]) < 2:
-            chunks[-1] = chunks[-1].ljust(2, b'0')
-        return HestiaModbusMaster._bytes_to_integers(chunks)
+        if len(data) % 2:
+            data = data + b'0'
+        return _be_u16(len(data) // 2).unpack(data)
 
-    def _at_command_to_ascii(self, cmd):
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def at_command_to_ascii(cmd):
         """
-        Convert AT command string to list of ASCII codes.
+        Convert AT command string to register values (two ASCII codes per register).
+        
+        Results are cached: the same few AT commands are sent over and over.
         
         Args:
             cmd (str): AT command string
             
         Returns:
-            list: List of ASCII codes with padding
+            tuple: Register values, NUL-padded to an even number of bytes
         """
-        ascii_codes = []
-        result = []
-        for char in cmd:
-            ascii_codes.append(ord(char))
-        if len(ascii_codes) % 2 != 0:
-            ascii_codes.append(0)
-
-        # Process pairs of bytes
-        for i in range(0, len(ascii_codes)-1, 2):
-            # Shift first byte left 8 bits and add second byte
-            combined = (ascii_codes[i] << 8) + ascii_codes[i + 1]
-            result.append(combined)
-        return result
+        data = cmd.encode('latin-1')
+        if len(data) % 2:
+            data += b'\x00'
+        return _be_u16(len(data) // 2).unpack(data)
 
     def pcie2_set_cmd(self, cmd):
         """
@@ -227,16 +395,50 @@ class HestiaModbusMaster:
             if cmd is not None:
                 # Convert AT command to ASCII codes
                 cmd = cmd + '\r\n'
-                ascii_cmd = self._at_command_to_ascii(cmd)
-                logger.info(f'ASCII command: {ascii_cmd}')
-                value = self.set_registers(0xC700, ascii_cmd)
+                ascii_cmd = self.at_command_to_ascii(cmd)
+                value = self.set_registers(PCIE2_CMD_START, ascii_cmd)
                 return value
             else:
                 return False
         except Exception as e:
-            logger.info(e)
+            logger.error(e)
             return False
 
+    def _read_pcie2_response(self, reg_data_len, reg_data_start, prefetch_len):
+        """
+        Read a PCIe2 response: the length register plus the first prefetch_len data
+        registers in one transaction, and only the remainder (if any) in a second.
+        
+        Args:
+            reg_data_len (int): Response length register (data follows it directly)
+            reg_data_start (int): First response data register
+            prefetch_len (int): Data registers read together with the length
+            
+        Returns:
+            tuple: (data length or None if error, register values or None)
+        """
+        block = None
+        if self._pcie2_prefetch:
+            block = self.read_registers(reg_data_len, 1 + prefetch_len, zero_as_none=False)
+        if block is None:
+            data_len = self.read_register(reg_data_len)
+            if self._pcie2_prefetch and data_len is not None:
+                # Link is fine but the block read failed: fall back to separate reads
+                logger.info('PCIe2 prefetch read rejected, using separate length/data reads')
+                self._pcie2_prefetch = False
+            if not data_len:
+                return data_len, None
+            return data_len, self.read_registers(reg_data_start, data_len, zero_as_none=False)
+
+        data_len = block[0]
+        if not data_len:
+            return data_len, None
+        pcie2_data = block[1:1 + data_len]
+        if data_len > prefetch_len:
+            rest = self.read_registers(reg_data_start + prefetch_len, data_len - prefetch_len, zero_as_none=False)
+            pcie2_data = pcie2_data + rest if rest else None
+        return data_len, pcie2_data
+
     def pcie2_cmd(self, cmd):
         """
         Send command to PCIe2 module and read response.
@@ -248,49 +450,33 @@ class HestiaModbusMaster:
             str or None: Response data or None if error
         """
         data = None
-        if cmd == 'AT+BISGET=?':
-            reg_data_len = 0xF460
-            reg_data_start = 0xF461
-        else:
-            reg_data_len = 0xF860
-            reg_data_start = 0xF861
-
-        if cmd == 'ATZ':
-            time_to_wait = 5
-        else:
-            time_to_wait = 3
+        reg_data_len, reg_data_start, time_to_wait, hex_quoted, prefetch_len = (
+            PCIE2_PROFILES.get(cmd)
+            or PCIE2_PROFILES.get(cmd[:len(PCIE2_BISGET)], PCIE2_DEFAULT_PROFILE))
 
         ret = self.pcie2_set_cmd(cmd)
-        logger.info(f'Command: {cmd}, ret: {ret}')
+        logger.debug('Command: %s, ret: %s', cmd, ret)
         if ret:
-            sleep(time_to_wait)
-            data_len_to_read = 0
             try:
-                # Read response from PCIe2 module
-                data_len_to_read = self.read_register(reg_data_len)
-                logger.info(f'data length to read: {hex(reg_data_len)}, {data_len_to_read}')
+                # The length register is only valid once the module has answered: it can still
+                # hold the previous response's length, so wait the command's full response time
+                sleep(time_to_wait)
+                data_len_to_read, pcie2_data = self._read_pcie2_response(reg_data_len, reg_data_start, prefetch_len)
+                logger.debug('data length to read: %#x, %s', reg_data_len, data_len_to_read)
                 if data_len_to_read:
-                    logger.info(f'data length to read: {data_len_to_read}')
-                    a_codes = []
-                    pcie2_data = self.read_registers(reg_data_start, data_len_to_read)
                     if pcie2_data:
-                        for d in pcie2_data:
-                            a_codes.append(d >> 8)
-                            a_codes.append(d & 0xFF)
-                        if cmd == 'AT+BISGET=?':
-                            idx_1st = a_codes.index(34)
-                            logger.debug(f'Index: {idx_1st}')
-                            idx_2nd = a_codes.index(34, idx_1st+1)
-                            logger.debug(f'Index: {idx_2nd}')
-                            a_codes = a_codes[idx_1st+1:idx_2nd]
-                            logger.debug(f'a_codes: {a_codes}')
-                            data = binascii.unhexlify(bytes(a_codes)).decode('utf8')
+                        buf = self.registers_to_bytes(pcie2_data)
+                        logger.debug('buf: %r', buf)
+                        if hex_quoted:
+                            # Hex payload between the two '"' sentinels
+                            idx_1st = buf.index(b'"')
+                            idx_2nd = buf.index(b'"', idx_1st+1)
+                            data = binascii.unhexlify(buf[idx_1st+1:idx_2nd]).decode('utf8')
                         else:
-                            logger.debug(f'a_codes: {a_codes}')
-                            data = bytes(a_codes).decode('utf8')
+                            data = buf.decode('utf8')
                     else:
                         data = None
             except Exception as e:
-                logger.info(e)
+                logger.error(e)
                 return None
-        return data
\ No newline at end of file
+        return data
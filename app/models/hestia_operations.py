@@ -1,17 +1,8 @@
-import binascii
 import json
 import logging
-import modbus_tk
 import modbus_tk.defines as cst
-import modbus_tk.modbus_rtu as modbus_rtu
-
 import os
-import re
-import serial
 import threading
-import struct
-import zlib
-from packaging import version
 from app.models.hestia_modbus_master import HestiaModbusMaster as hestia_modbus
 from time import sleep
 from time import time
@@ -64,43 +55,55 @@ NTN_UDP_IP_LEN = 8
 NTN_UDP_SOCKET = 0xEB32
 NTN_UDP_SOCKET_LEN = 1
 
+# IMSI through GPS longitude, read in one transaction and sliced locally
+NTN_INFO_BLOCK = NTN_IMSI
+NTN_INFO_BLOCK_LEN = NTN_GPS_LON + NTN_GPS_LON_LEN - NTN_IMSI
+# Reuse a block read for this long (seconds), so one status refresh costs one read
+NTN_INFO_BLOCK_MAX_AGE = 1.0
+
 NTN_ACTIVE_MODE = 0xC358
 NTN_ACTIVE_MODE_LEN = 1
 
 NTN_SND_START = 0xC550
 NTN_SND_RESP_LEN_REG = 0xF060
 NTN_SND_RESP = 0xF061
+# Registers written per uplink chunk
+NTN_SND_CHUNK_LEN = 64
+# Uplink response polling: back off from a few character times up to this interval (seconds)
+NTN_SND_RESP_POLL_MAX = 0.2
+# Give up waiting for an uplink response after this long (seconds)
+NTN_SND_RESP_TIMEOUT = 120
 
 NTN_DL_DATA_LEN_REG = 0xEC60
 NTN_DL_DATA_START = 0xEC61
-
-PCIE2_CMD_START = 0xC700
-PCIE2_DATA_LEN = 0xF460
-PCIE2_DATA_START = 0xF461
-PCIE2_MOD_LEN = 0xF860
-PCIE2_MOD_START = 0xF861
+# Payload registers read together with the length register on each downlink poll
+NTN_DL_PREFETCH_LEN = 32
+# Downlink poll interval (seconds): right after data, and the idle backoff range
+DL_POLL_BUSY = 0.1
+DL_POLL_MIN = 1
+DL_POLL_MAX = 5
 
 NTN_NIDD_MODE = 0x1
 NTN_UDP_MODE = 0x2
 
-def ver_compare(version1, version2):
-    v1 = version.parse(version1)
-    v2 = version.parse(version2)
-
-    if v1 >= v2:
-        #print(f"{version1} is greater or equal than {version2}")  # This will print
-        return True
-    elif v1 < v2:
-        #print(f"{version1} is less than {version2}")
-        return False
+# Module status flags per service mode: ((name, bit mask), ...), mask of bits that must all be set for all_ready
+NTN_STATUS_FLAGS = {
+    NTN_NIDD_MODE: ((('module_at_ready', 0x01), ('downlink_ready', 0x02),
+                     ('sim_ready', 0x04), ('network_registered', 0x08)), 0x0F),
+    NTN_UDP_MODE: ((('module_at_ready', 0x01), ('ip_ready', 0x02), ('sim_ready', 0x04),
+                    ('network_registered', 0x08), ('socket_ready', 0x10)), 0x1F),
+}
 
 class hestia(threading.Thread):
     def __init__(self, port, dl_callback, lock = None, slave_addr = 1, baudrate = 115200, bytesize = 8, parity = 'N', stopbits = 1, xonxoff = 0, verbose = False, reset_callback = None):
         try:
-            self.ntn = hestia_modbus(slave_address = slave_addr, port = port, baudrate = baudrate, lock=lock, verbose=verbose)
+            """ shared with any other hestia on the same port (released in stop()) """
+            self.ntn = hestia_modbus.acquire(slave_address = slave_addr, port = port, baudrate = baudrate, lock=lock, verbose=verbose)
             
             self.port = port
             self.baudrate = baudrate
+            """ shortest response poll interval: 4 character times (11 bits each) """
+            self._poll_min = max(0.001, 11.0 / baudrate * 4)
             self.dev_addr = slave_addr
             self.modbus_lock = self.ntn.lock
             self.verbose = verbose
@@ -108,10 +111,18 @@ class hestia(threading.Thread):
             self.dongle_model_name = None
             self.dongle_fw_ver = None
             self.dongle_sn_sku = None
+            self.dongle_imsi = None
             self.set_passwd = False
             self.srv_mode = 0
             self.active_mode = None
             
+            """ last NTN info block read: (timestamp, registers or None) """
+            self._ntn_block = None
+            """ read the NTN info fields in one block (until the dongle rejects it) """
+            self._ntn_block_read = True
+            """ read the downlink length and payload start in one transaction (until the dongle rejects it) """
+            self._dl_prefetch = True
+            
             """ downlink callback """
             self.dl_callback = dl_callback
             
@@ -131,11 +142,6 @@ class hestia(threading.Thread):
             logger.error(f'Exception Error - Code={e}')
             raise (e)
 
-    #def set_slave_address(self, slaveAddr):
-    #    if self.ntn:
-    #        with self.set_lock and self.ntn.lock:
-    #            self.ntn.set_slave_address(slaveAddr)
-
     def set_password(self, passwd) -> bool:
         """ 
         Set Password
@@ -151,41 +157,82 @@ class hestia(threading.Thread):
 
     def model_name(self) -> str:
         """ 
-        Read MCU MODEL name 
+        Read MCU MODEL name (cached, cleared on stop/restart)
         """
+        if self.dongle_model_name is not None:
+            return self.dongle_model_name
         model_name = self.ntn.read_registers(MCU_MODEL_NAME, MCU_MODEL_NAME_LEN)
         if model_name:
-            self.dongle_model_name = hestia_modbus.modbus_data_to_string(model_name).replace('\x00', '')
+            self.dongle_model_name = hestia_modbus.modbus_data_to_string(model_name, 'ascii', strip_nul=True)
             return self.dongle_model_name
         return None
 
     def fw_ver(self) -> str:
         """ 
-        Read MCU FW version 
+        Read MCU FW version (cached, cleared on stop/restart)
         """
+        if self.dongle_fw_ver is not None:
+            return self.dongle_fw_ver
         fw_ver = self.ntn.read_registers(MCU_FW_VER, MCU_FW_VER_LEN)
         if fw_ver:
-            self.dongle_fw_ver = hestia_modbus.modbus_data_to_string(fw_ver).replace('\x00', '')
+            self.dongle_fw_ver = hestia_modbus.modbus_data_to_string(fw_ver, 'ascii', strip_nul=True)
             return self.dongle_fw_ver
         return None
 
     def sn_sku(self) -> str:
         """ 
-        Read MCU SN/SKU 
+        Read MCU SN/SKU (cached, cleared on stop/restart)
         """
+        if self.dongle_sn_sku is not None:
+            return self.dongle_sn_sku
         sn_sku = self.ntn.read_registers(MCU_SN_SKU, MCU_SN_SKU_LEN)
         if sn_sku:
-            self.dongle_sn_sku = hestia_modbus.modbus_data_to_string(sn_sku).replace('\x00', '')
+            self.dongle_sn_sku = hestia_modbus.modbus_data_to_string(sn_sku, 'ascii', strip_nul=True)
             return self.dongle_sn_sku
         return None
 
+    def _read_ntn_field(self, reg, length):
+        """
+        Read registers inside the NTN info block (IMSI..GPS longitude)
+        
+        The whole block is read once and reused for NTN_INFO_BLOCK_MAX_AGE seconds,
+        so imsi(), get_network_info() and get_gps_info() share a single Modbus
+        transaction. Falls back to direct reads for good once the dongle rejects
+        the block read.
+        
+        Returns: list: Register values, or None if unavailable (all zero)
+        """
+        if not self._ntn_block_read:
+            return self.ntn.read_registers(reg, length)
+        now = time()
+        if self._ntn_block is None or now - self._ntn_block[0] >= NTN_INFO_BLOCK_MAX_AGE:
+            self._ntn_block = (now, self.ntn.read_registers(NTN_INFO_BLOCK, NTN_INFO_BLOCK_LEN, zero_as_none=False))
+        block = self._ntn_block[1]
+        if block is None:
+            values = self.ntn.read_registers(reg, length, zero_as_none=False)
+            if values is not None:
+                # Link is fine but the block read failed: stop trying it every cycle
+                logger.info('NTN info block read rejected, using per-field reads')
+                self._ntn_block_read = False
+            # Same convention as read_registers(): an all-zero field is reported as missing
+            return values if values and any(values) else None
+        offset = reg - NTN_INFO_BLOCK
+        values = block[offset:offset + length]
+        # Same convention as read_registers(): an all-zero field is reported as missing
+        if not any(values):
+            return None
+        return values
+
     def imsi(self) -> str:
         """ 
-        Read IMSI 
+        Read IMSI (cached once the SIM reports one, cleared on stop/restart)
         """
-        imsi = self.ntn.read_registers(NTN_IMSI, NTN_IMSI_LEN)
+        if self.dongle_imsi is not None:
+            return self.dongle_imsi
+        imsi = self._read_ntn_field(NTN_IMSI, NTN_IMSI_LEN)
         if imsi:
-            return hestia_modbus.modbus_data_to_string(imsi).rstrip('\x00')
+            self.dongle_imsi = hestia_modbus.modbus_data_to_string(imsi, 'ascii', strip_nul=True)
+            return self.dongle_imsi
         return None
 
     def module_status(self) -> dict:
@@ -196,27 +243,22 @@ class hestia(threading.Thread):
             dict: Status information
         """
         status_reg = self.ntn.read_register(NTN_MODULE_STATUS)
-        logger.info(f'ntn_status: {bin(status_reg)[2:].zfill(8)}')
-        logger.info(f'srv_mode: {self.srv_mode}')
         if not status_reg:
+            logger.debug('ntn_status: %s, srv_mode: %s', status_reg, self.srv_mode)
             return None
+        logger.debug('ntn_status: %s, srv_mode: %s', format(status_reg, '08b'), self.srv_mode)
         
-        status = {}
+        # Bits 7..0 (MSB first); always 8 entries, whatever is in the register's high byte
+        raw_status = tuple(map(int, format(status_reg & 0xFF, '08b')))
+        flags = NTN_STATUS_FLAGS.get(self.srv_mode)
+        if flags is None:
+            # Service mode not read yet: only the raw bits mean anything
+            return {'raw_status': raw_status}
         
-        if self.srv_mode == 1:
-            status['module_at_ready'] = bool(status_reg & 0x01)
-            status['downlink_ready'] = bool((status_reg & 0x02) >> 1)
-            status['sim_ready'] = bool((status_reg & 0x04) >> 2)
-            status['network_registered'] = bool((status_reg & 0x08) >> 3)
-            status['all_ready'] = ((status_reg & 0x0F)== 0x0F)
-        elif self.srv_mode == 2:
-            status['module_at_ready'] = bool(status_reg & 0x01)
-            status['ip_ready'] = bool((status_reg & 0x02) >> 1)
-            status['sim_ready'] = bool((status_reg & 0x04) >> 2)
-            status['network_registered'] = bool((status_reg & 0x08) >> 3)
-            status['socket_ready'] = bool((status_reg & 0x10) >> 4)
-            status['all_ready'] = ((status_reg & 0x1F) == 0x1F)
-        status['raw_status'] = tuple((status_reg >> (7-i)) & 1 for i in range(8))
+        names, all_ready_mask = flags
+        status = {name: bool(status_reg & mask) for name, mask in names}
+        status['all_ready'] = (status_reg & all_ready_mask) == all_ready_mask
+        status['raw_status'] = raw_status
         return status
         
     def get_network_info(self) -> dict:
@@ -229,18 +271,18 @@ class hestia(threading.Thread):
         info = {}
         
         # Read SINR
-        sinr_data = self.ntn.read_registers(NTN_SINR, NTN_SINR_LEN)
+        sinr_data = self._read_ntn_field(NTN_SINR, NTN_SINR_LEN)
         if sinr_data:
-            sinr = hestia_modbus.modbus_data_to_string(sinr_data)
+            sinr = hestia_modbus.modbus_data_to_string(sinr_data, 'ascii', strip_nul=True)
             info['sinr'] = sinr
-            print(f'SINR: {sinr}')
+            logger.debug('SINR: %s', sinr)
         
         # Read RSRP
-        rsrp_data = self.ntn.read_registers(NTN_RSRP, NTN_RSRP_LEN)
+        rsrp_data = self._read_ntn_field(NTN_RSRP, NTN_RSRP_LEN)
         if rsrp_data:
-            rsrp = hestia_modbus.modbus_data_to_string(rsrp_data)
+            rsrp = hestia_modbus.modbus_data_to_string(rsrp_data, 'ascii', strip_nul=True)
             info['rsrp'] = rsrp
-            print(f'RSRP: {rsrp}')
+            logger.debug('RSRP: %s', rsrp)
         
         return info
     
@@ -253,43 +295,20 @@ class hestia(threading.Thread):
         """
         info = {}
         # Read Latitude
-        lat_data = self.ntn.read_registers(NTN_GPS_LAT, NTN_GPS_LAT_LEN)
+        lat_data = self._read_ntn_field(NTN_GPS_LAT, NTN_GPS_LAT_LEN)
         if lat_data:
-            latitude = hestia_modbus.modbus_data_to_string(lat_data)
-            info['latitude'] = float(latitude)
-            print(f'Latitude: {latitude}')
+            # float() parses the ASCII bytes directly, no str decode needed
+            info['latitude'] = float(hestia_modbus.registers_to_bytes(lat_data).rstrip(b'\x00'))
+            logger.debug('Latitude: %s', info['latitude'])
         
         # Read Longitude
-        lon_data = self.ntn.read_registers(NTN_GPS_LON, NTN_GPS_LON_LEN)
+        lon_data = self._read_ntn_field(NTN_GPS_LON, NTN_GPS_LON_LEN)
         if lon_data:
-            longitude = hestia_modbus.modbus_data_to_string(lon_data)
-            info['longitude'] = float(longitude)
-            print(f'Longitude: {longitude}')
+            info['longitude'] = float(hestia_modbus.registers_to_bytes(lon_data).rstrip(b'\x00'))
+            logger.debug('Longitude: %s', info['longitude'])
         
         return info
     
-    def _at_command_to_ascii(self, command):
-        """
-        Convert AT command string to list of ASCII codes
-        Args:
-            command (str): AT command string
-        Returns:
-            list: List of ASCII codes with padding
-        """
-        ascii_codes = []
-        result = []
-        for char in command:
-            ascii_codes.append(ord(char))
-        if len(ascii_codes)%2 != 0:
-            ascii_codes.append(0)
-
-        # Process pairs of bytes
-        for i in range(0, len(ascii_codes)-1, 2):
-            # Shift first byte left 8 bits and add second byte
-            combined = (ascii_codes[i] << 8) + ascii_codes[i + 1]
-            result.append(combined)
-        return result
-
     def pcie2_set_cmd(self, command):
         """
         Set command to PCIe2 module
@@ -300,19 +319,7 @@ class hestia(threading.Thread):
         Returns:
             bool: True if successful, False otherwise
         """
-        try:
-            if command is not None:
-                # Convert AT command to ASCII codes
-                command = command + '\r\n'
-                ascii_cmd = self._at_command_to_ascii(command)
-                logger.debug(f'ASCII command: {ascii_cmd}')
-                value = self.ntn.set_registers(PCIE2_CMD_START, ascii_cmd)
-                return value
-            else:
-                return False
-        except Exception as e:
-            logger.error(e)
-            return False
+        return self.ntn.pcie2_set_cmd(command)
 
     def pcie2_cmd(self, command):
         """
@@ -325,56 +332,7 @@ class hestia(threading.Thread):
             str: Response data or None if error
         """
         with self.pcie2_lock:
-            data = None
-            if 'AT+BISGET=' in command:
-                reg_data_len = PCIE2_DATA_LEN
-                reg_data_start = PCIE2_DATA_START
-            else:
-                reg_data_len = PCIE2_MOD_LEN
-                reg_data_start = PCIE2_MOD_START
-
-            if command == 'ATZ':
-                wait_time = 5
-            elif 'AT+BISGET=' in command:
-                wait_time = 1
-            else:
-                wait_time = 3
-
-            ret = self.pcie2_set_cmd(command)
-            logger.debug(f'command: {command}, ret: {ret}')
-            if ret:
-                sleep(wait_time)
-                data_len_to_read = None
-                try:
-                    # Read response length from PCIe2 module
-                    data_len_to_read = self.ntn.read_register(reg_data_len)
-                    logger.debug(f'data length to read: {hex(reg_data_len)}, {data_len_to_read}')
-                    if data_len_to_read:
-                        logger.debug(f'data length to read: {data_len_to_read}')
-                        a_codes = []
-                        pcie2_data = self.ntn.read_registers(reg_data_start, data_len_to_read)
-                        logger.debug(f'data: {pcie2_data}')
-                        if pcie2_data:
-                            for d in pcie2_data:
-                                a_codes.append(d >> 8)
-                                a_codes.append(d & 0xFF)
-                            if 'AT+BISGET=' in command:
-                                idx_1st = a_codes.index(34)
-                                logger.debug(f'Index: {idx_1st}')
-                                idx_2nd = a_codes.index(34, idx_1st+1)
-                                logger.debug(f'Index: {idx_2nd}')
-                                a_codes = a_codes[idx_1st+1:idx_2nd]
-                                logger.debug(f'a_codes: {a_codes}')
-                                data = binascii.unhexlify(bytes(a_codes)).decode('utf8')
-                            else:
-                                logger.debug(f'a_codes: {a_codes}')
-                                data = bytes(a_codes).decode('utf8')
-                        else:
-                            data = None
-                except Exception as e:
-                    logger.error(e)
-                    return None
-            return data
+            return self.ntn.pcie2_cmd(command)
 
     def get_service_mode(self):
         """
@@ -417,7 +375,7 @@ class hestia(threading.Thread):
         Returns: bool: True if upload is available, False otherwise
         """
         upload_avbl = self.ntn.read_register(NTN_UPLOAD_AVBL)
-        logger.info(f'{upload_avbl=}')
+        logger.debug('upload_avbl=%s', upload_avbl)
         if upload_avbl != None and upload_avbl == 0:
             return True
         else:
@@ -440,58 +398,41 @@ class hestia(threading.Thread):
             else:
                 d_str = json.dumps(data)
 
-            logger.debug(f'd_str: {d_str}')
-            d_bytes = d_str.encode('utf-8')
-            logger.debug(f'd_bytes: {d_bytes}')
-            d_hex  = binascii.hexlify(d_bytes)
-            logger.debug(f'packet: {d_hex}')
-
-            """ add "\r\n" in the end of data """
-            d_hex = d_hex + b'\r\n'
+            logger.debug('d_str: %s', d_str)
+            """ ASCII-hex encode the payload and add "\r\n" in the end of data """
+            d_hex = (d_str.encode('utf-8').hex() + '\r\n').encode('ascii')
+            logger.debug('packet: %r', d_hex)
             modbus_data = hestia_modbus.bytes_to_list_with_padding(d_hex)
 
-            pos_s = 0
-            pos_next_s = 0
-            pos_e = 64
-            resp = None
-            eod = False
-            while True:
-                in_data_len = len(modbus_data)
-                if in_data_len - pos_next_s > 64:
-                    pos_s = pos_next_s
-                    output_d = modbus_data[pos_s:pos_e]
-                    pos_next_s += 64
-                    pos_e += 64
-                else:
-                    pos_s = pos_next_s
-                    output_d = modbus_data[pos_s:]
-                    eod = True
-                #logger.debug(f'pos_s: {pos_s}, pos_next_s: {pos_next_s}, pos_e: {pos_e}')
-                #logger.debug(f'output_d: {output_d}')
-                #logger.debug(f'NTN_SND_START+pos_s: {NTN_SND_START+pos_s}')
-                #logger.debug(f'eod: {eod}')
-                resp = self.ntn.set_registers(NTN_SND_START+pos_s, output_d)
-                if resp:
-                    if eod:
-                        while True:
-                            resp_data_len = 0
-                            data_resp = None
-                            resp_data_len = self.ntn.read_register(NTN_SND_RESP_LEN_REG)
-                            if resp_data_len:
-                                data_resp = self.ntn.read_registers(NTN_SND_RESP, resp_data_len)
-                                if data_resp:
-                                    ret_V = hestia_modbus.modbus_data_to_string(data_resp)
-                                    logger.info(f'Uplink Response: {ret_V}')
-                                    if 'Uplink Completed' in ret_V:
-                                        retV = True
-                                break
-                            else:
-                                """ check response status in 1 sec """
-                                sleep(1)
-                        break
-                else:
+            in_data_len = len(modbus_data)
+            for pos_s in range(0, in_data_len, NTN_SND_CHUNK_LEN):
+                eod = pos_s + NTN_SND_CHUNK_LEN >= in_data_len
+                resp = self.ntn.set_registers(NTN_SND_START+pos_s, modbus_data[pos_s:pos_s + NTN_SND_CHUNK_LEN])
+                if not resp:
                     """ send data response Failed """
                     break
+                if eod:
+                    poll = self._poll_min
+                    deadline = time() + NTN_SND_RESP_TIMEOUT
+                    while True:
+                        resp_data_len = 0
+                        data_resp = None
+                        resp_data_len = self.ntn.read_register(NTN_SND_RESP_LEN_REG)
+                        if resp_data_len:
+                            data_resp = self.ntn.read_registers(NTN_SND_RESP, resp_data_len, zero_as_none=False)
+                            if data_resp:
+                                ret_V = hestia_modbus.modbus_data_to_string(data_resp)
+                                logger.info('Uplink Response: %s', ret_V)
+                                if 'Uplink Completed' in ret_V:
+                                    retV = True
+                            break
+                        elif time() >= deadline:
+                            logger.warning(f'No uplink response after {NTN_SND_RESP_TIMEOUT} sec')
+                            break
+                        else:
+                            """ check response status again, backing off up to NTN_SND_RESP_POLL_MAX """
+                            sleep(poll)
+                            poll = min(NTN_SND_RESP_POLL_MAX, poll * 2)
             return retV
         except Exception as e:
             logger.error(f'Code = {e}')
@@ -511,11 +452,20 @@ class hestia(threading.Thread):
         """
         self.stop_event.set()
         self.resume()
-        while self.stop_event.is_set():
-            sleep(1)
-        else:
-            with self.pcie2_lock:
-                self.ntn = None
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+        with self.pcie2_lock:
+            if self.ntn:
+                self.ntn.release()
+            self.ntn = None
+        self._clear_identity()
+
+    def _clear_identity(self):
+        """ Forget the cached device identity so it is read again from the dongle """
+        self.dongle_model_name = None
+        self.dongle_fw_ver = None
+        self.dongle_sn_sku = None
+        self.dongle_imsi = None
 
     def restart(self):
         """ 
@@ -524,13 +474,53 @@ class hestia(threading.Thread):
         Returns: bool: True if successful, False otherwise
         handle return False outside if need to exit program
         """
+        self._clear_identity()
         try:
-            self.ntn = hestia_modbus(slave_addr = self.dev_addr, port = self.port, baudrate = self.baudrate, lock=self.modbus_lock, verbose=self.verbose)
+            if self.ntn:
+                self.ntn.reopen()
+            else:
+                self.ntn = hestia_modbus.acquire(slave_address = self.dev_addr, port = self.port, baudrate = self.baudrate, lock=self.modbus_lock, verbose=self.verbose)
             return True
         except Exception as e:
+            logger.error(f'Failed to restart Modbus connection on {self.port}: {e}')
+            if self.ntn:
+                self.ntn.release()
             self.ntn = None
             return False
 
+    def _read_downlink(self):
+        """
+        Read pending downlink data
+        
+        The length register and the first NTN_DL_PREFETCH_LEN payload registers are
+        read in one transaction, so an idle poll is a single round-trip and a short
+        downlink needs no second read.
+        
+        Returns: tuple: (data length or None if communication failed, register values or None)
+        """
+        block = None
+        if self._dl_prefetch:
+            block = self.ntn.read_registers(NTN_DL_DATA_LEN_REG, 1 + NTN_DL_PREFETCH_LEN, zero_as_none=False)
+        if block is None:
+            data_len = self.ntn.read_register(NTN_DL_DATA_LEN_REG)
+            if self._dl_prefetch and data_len is not None:
+                # Link is fine but the block read failed: fall back to separate reads
+                logger.info('Downlink prefetch read rejected, using separate length/data reads')
+                self._dl_prefetch = False
+            if not data_len:
+                return data_len, None
+            return data_len, self.ntn.read_registers(NTN_DL_DATA_START, data_len, zero_as_none=False)
+
+        data_len = block[0]
+        if not data_len:
+            return data_len, None
+        dl_resp = block[1:1 + data_len]
+        if data_len > NTN_DL_PREFETCH_LEN:
+            rest = self.ntn.read_registers(NTN_DL_DATA_START + NTN_DL_PREFETCH_LEN,
+                                           data_len - NTN_DL_PREFETCH_LEN, zero_as_none=False)
+            dl_resp = dl_resp + rest if rest else None
+        return data_len, dl_resp
+
     def run(self):
         """
         Background thread to monitor downlink data
@@ -538,9 +528,12 @@ class hestia(threading.Thread):
         Args:
             ntn_master: NTN Modbus Master instance
         """
+        poll_interval = DL_POLL_MIN
         while True:
             if not self.set_passwd:
-                sleep(1)
+                """ not logged in: nothing to poll, but stop() must still end the thread """
+                if self.stop_event.wait(1):
+                    break
                 continue
             
             """ will wait here if pause_event is cleared """
@@ -548,17 +541,15 @@ class hestia(threading.Thread):
             
             with self.set_lock:
                 try:
-                    data_len = 0
-                    data_len = self.ntn.read_register(NTN_DL_DATA_LEN_REG)
+                    data_len, dl_resp = self._read_downlink()
                     if data_len:
-                        dl_resp = self.ntn.read_registers(NTN_DL_DATA_START, data_len)
-                        logger.debug(f'Downlink data response: {dl_resp}')
-                        #sample of dl_resp for testing
-                        #dl_resp = (14178, 12850, 13876, 13873, 14132, 13873, 12850, 13153, 12848, 14178, 12850, 14132, 13881, 13924, 13877, 14128, 13877, 14130, 13881, 13926, 13876, 14131, 12850, 13153, 12848, 13107, 13104, 13104, 14180, 14180)
+                        logger.debug('Downlink data response: %s', dl_resp)
                         if dl_resp:
-                            dl_data = b''.join(struct.pack('>H', v) for v in dl_resp)
+                            dl_data = hestia_modbus.registers_to_bytes(dl_resp)
                             if self.dl_callback:
                                 self.dl_callback(dl_data, len(dl_data))
+                        """ more downlinks may be queued, poll again shortly """
+                        poll_interval = DL_POLL_BUSY
                     elif data_len == None:
                         sleep(1)
                         logger.error(f'Lost communication, trying to reset Password')
@@ -571,17 +562,13 @@ class hestia(threading.Thread):
                                 if not self.restart():
                                     logger.error(f'Failed to restart Modbus connection, will retry in 5 seconds')
                         sleep(5)
-                        pass
                     else:
-                        logger.debug(f'Downlink data length: {data_len}')
-                        sleep(1)
-                        pass
+                        logger.debug('Downlink data length: %s', data_len)
+                        """ idle, back off """
+                        poll_interval = min(DL_POLL_MAX, max(DL_POLL_MIN, poll_interval * 1.5))
                 except Exception as e:
                     logger.error(f"Error in downlink_modbus: {e}")
-                    #sleep(1)
-            if self.stop_event.is_set():
-                self.stop_event.clear()
-                logger.info(f'Ready to kill')
+            if self.stop_event.wait(poll_interval):
                 break
-            sleep(1)
+        logger.info(f'Ready to kill')
 
@@ -2,15 +2,51 @@
 LoRa device management models
 """
 
+import atexit
 import configparser
 import logging
 import os
-from app.models.config_manager import ConfigManager
+import signal
+import threading
+from app.models.config_manager import ConfigManager, flock
 
 logger = logging.getLogger(__name__)
 
+# DEVICES section layout, one key per field: device<N><suffix>
+# (get_devices_data field, add_device input key, key suffix, default)
+_DEVICE_FIELDS = (
+    ('idx', 'idx', '_idx', '0'),
+    ('id', 'id', '_id', ''),
+    ('nsKey', 'ns_key', '_ns_key', ''),
+    ('appKey', 'app_key', '_app_key', ''),
+    ('transmit_interval', 'transmit_interval', '_ti', ''),
+)
+
+# Changes are written back this long after the first one, so a burst of edits costs one write
+_FLUSH_DELAY = 0.25  # seconds
+
+
+def _file_key(path):
+    """Change key for a file: (mtime_ns, size), or None if it is missing"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+
 class LoRaConfigManager(ConfigManager):
     """LoRa configuration manager"""
+
+    # Parsed lora.ini shared by all instances (one is created per request): path -> (file key, config)
+    _config_cache = {}
+    # Serializes access to the shared cached ConfigParser and its read-modify-write cycles
+    _config_lock = threading.RLock()
+    # Configs changed in memory but not yet written: path -> config
+    _pending = {}
+    _flush_timer = None
+    # Devices of a cached config keyed by device number: path -> (config, index)
+    _device_index_cache = {}
     
     def __init__(self):
         super().__init__()
@@ -18,16 +54,47 @@ class LoRaConfigManager(ConfigManager):
         logger.debug(f"LoRa configuration file: {self.lora_file}")
     
     def read_lora_config(self):
-        """Read LoRa configuration"""
-        config = configparser.ConfigParser()
-        if os.path.exists(self.lora_file):
-            config.read(self.lora_file)
-       
+        """Read LoRa configuration (a private copy, safe to use without the lock)"""
+        with self._config_lock:
+            config = configparser.ConfigParser(interpolation=None)
+            config.read_dict(self._load_config())
+            return config
+
+    def _load_config(self):
+        """Shared cached configuration (parsed once, then reused until lora.ini changes);
+        callers must hold _config_lock while they use it"""
+        with self._config_lock:
+            # Unwritten changes win over whatever is on disk
+            pending = self._pending.get(self.lora_file)
+            if pending is not None:
+                return pending
+
+            file_key = _file_key(self.lora_file)
+            cached = self._config_cache.get(self.lora_file)
+            if file_key is not None and cached is not None and cached[0] == file_key:
+                return cached[1]
+
+            config = configparser.ConfigParser(interpolation=None)
+            if file_key is not None:
+                config.read(self.lora_file)
+
+            # Only write back when default sections had to be added
+            if self._ensure_sections(config):
+                self.save_lora_config(config)
+            else:
+                self._config_cache[self.lora_file] = (file_key, config)
+            return config
+
+    @staticmethod
+    def _ensure_sections(config):
+        """Add missing default sections to config; returns True if anything was added"""
+        dirty = False
         if 'NTN-DONGLE' not in config:
             config['NTN-DONGLE'] = {
                 'serial_interface': '/dev/ttyUSB0',
                 'dongle_id': ''
             }
+            dirty = True
             
         if 'LORA' not in config:
             config['LORA'] = {
@@ -36,116 +103,208 @@ class LoRaConfigManager(ConfigManager):
                 'ch_plan': '',
                 'registered_status': 'no'
             }
+            dirty = True
         
         if 'DEVICES' not in config:
             config['DEVICES'] = {}
+            dirty = True
         
-        self.save_lora_config(config)
-        return config
+        return dirty
     
     def save_lora_config(self, config):
-        """Save LoRa configuration"""
-        with open(self.lora_file, 'w') as configfile:
-            config.write(configfile)
+        """Save LoRa configuration now, replacing any pending write"""
+        with self._config_lock:
+            self._pending.pop(self.lora_file, None)
+            self._write_config(self.lora_file, config)
+
+    @classmethod
+    def _write_config(cls, path, config):
+        """Write config atomically (temp file, fsync, rename over target) and cache it"""
+        tmp_file = path + '.tmp'
+        try:
+            # Other worker processes write the same file: serialize writers on a lock
+            # file (readers need no lock, they only ever see a complete file)
+            with open(path + '.lock', 'a') as lock_file, flock(lock_file):
+                with open(tmp_file, 'w') as configfile:
+                    config.write(configfile)
+                    configfile.flush()
+                    os.fsync(configfile.fileno())
+                os.replace(tmp_file, path)
+        except OSError:
+            # The caller already changed the cached object; don't serve it unsaved
+            cls._config_cache.pop(path, None)
+            raise
+        cls._config_cache[path] = (_file_key(path), config)
+
+    def _schedule_flush(self, config):
+        """Mark config as changed and write it back after _FLUSH_DELAY"""
+        with self._config_lock:
+            self._pending[self.lora_file] = config
+            if LoRaConfigManager._flush_timer is None:
+                timer = threading.Timer(_FLUSH_DELAY, LoRaConfigManager.flush)
+                timer.daemon = True
+                LoRaConfigManager._flush_timer = timer
+                timer.start()
+
+    @classmethod
+    def flush(cls):
+        """Write all pending configuration changes to disk now"""
+        with cls._config_lock:
+            timer, cls._flush_timer = cls._flush_timer, None
+            if timer is not None:
+                timer.cancel()
+            pending = list(cls._pending.items())
+            cls._pending.clear()
+            for path, config in pending:
+                try:
+                    cls._write_config(path, config)
+                except OSError as e:
+                    logger.error(f"Failed to save LoRa configuration {path}: {e}")
    
     def get_dongle_info(self):
         """Get LoRa dongle information"""
-        config = self.read_lora_config()
-        dongle_info = {
-            'serial_interface': config['NTN-DONGLE'].get('serial_interface', '/dev/ttyUSB0'),
-            'dongle_id': config['NTN-DONGLE'].get('dongle_id', ''),
-        }
-        logger.debug(f"Dongle info: {dongle_info}")
-        return dongle_info
+        with self._config_lock:
+            config = self._load_config()
+            dongle_info = {
+                'serial_interface': config['NTN-DONGLE'].get('serial_interface', '/dev/ttyUSB0'),
+                'dongle_id': config['NTN-DONGLE'].get('dongle_id', ''),
+            }
+            logger.debug(f"Dongle info: {dongle_info}")
+            return dongle_info
     
     def get_lora_data(self):
         """Get LoRa dongle data"""
-        config = self.read_lora_config()
-        data = {
-            'frequency': config['LORA'].get('frequency', ''),
-            'sf': config['LORA'].get('sf', ''),
-            'ch_plan': config['LORA'].get('ch_plan', ''),
-            'serial_interface': config['NTN-DONGLE'].get('serial_interface', '/dev/ttyUSB0'),
-            'dongle_id': config['NTN-DONGLE'].get('dongle_id', '')
-        }
-        logger.debug(f"LoRa data: {data}")
-        return data
+        with self._config_lock:
+            config = self._load_config()
+            data = {
+                'frequency': config['LORA'].get('frequency', ''),
+                'sf': config['LORA'].get('sf', ''),
+                'ch_plan': config['LORA'].get('ch_plan', ''),
+                'serial_interface': config['NTN-DONGLE'].get('serial_interface', '/dev/ttyUSB0'),
+                'dongle_id': config['NTN-DONGLE'].get('dongle_id', '')
+            }
+            logger.debug(f"LoRa data: {data}")
+            return data
     
-    def get_devices_data(self):
-        """Get LoRa devices data"""
-        config = self.read_lora_config()
+    def _device_index(self, config):
+        """Devices in config keyed by device number, built once per config and kept up to date by the mutators"""
+        cached = self._device_index_cache.get(self.lora_file)
+        if cached is not None and cached[0] is config:
+            return cached[1]
+        section = config['DEVICES']
         devices = {}
-        for key, value in config['DEVICES'].items():
+        for key in section:
             if key.endswith('_id'):
-                dev_num = key.replace('device', '').replace('_id', '')
-                devices[dev_num] = {
-                    'idx': config['DEVICES'].get(f'device{dev_num}_idx', '0'),
-                    'id': value,
-                    'nsKey': config['DEVICES'].get(f'device{dev_num}_ns_key', ''),
-                    'appKey': config['DEVICES'].get(f'device{dev_num}_app_key', ''),
-                    'transmit_interval': config['DEVICES'].get(f'device{dev_num}_ti', ''),
+                prefix = key[:-len('_id')]
+                devices[prefix.replace('device', '')] = {
+                    field: section.get(prefix + suffix, default)
+                    for field, _, suffix, default in _DEVICE_FIELDS
                 }
+        self._device_index_cache[self.lora_file] = (config, devices)
         return devices
+
+    def iter_devices(self):
+        """Iterate (device number, device data) pairs without building a new dict"""
+        with self._config_lock:
+            # Snapshot the entries so the lock isn't held while the caller iterates
+            devices = list(self._device_index(self._load_config()).items())
+        for dev_num, device in devices:
+            # Copies, so callers can't modify the cached index
+            yield dev_num, dict(device)
+
+    def device_count(self):
+        """Get the number of configured LoRa devices"""
+        with self._config_lock:
+            return len(self._device_index(self._load_config()))
+
+    def get_devices_data(self):
+        """Get LoRa devices data"""
+        return dict(self.iter_devices())
     
     def update_lora_settings(self, frequency, sf, ch_plan, serial_interface=None):
         """Update LoRa dongle settings"""
-        config = self.read_lora_config()
-        config['LORA']['frequency'] = frequency
-        config['LORA']['sf'] = sf
-        config['LORA']['ch_plan'] = ch_plan
-        if serial_interface is not None:
-            if 'NTN-DONGLE' not in config:
-                config['NTN-DONGLE'] = {}
-            config['NTN-DONGLE']['serial_interface'] = serial_interface
-        self.save_lora_config(config)
+        with self._config_lock:
+            config = self._load_config()
+            config['LORA']['frequency'] = frequency
+            config['LORA']['sf'] = sf
+            config['LORA']['ch_plan'] = ch_plan
+            if serial_interface is not None:
+                if 'NTN-DONGLE' not in config:
+                    config['NTN-DONGLE'] = {}
+                config['NTN-DONGLE']['serial_interface'] = serial_interface
+            self._schedule_flush(config)
     
     def add_device(self, device_data):
         """Add a new LoRa device"""
-        config = self.read_lora_config()
-        devices = {k: v for k, v in config['DEVICES'].items() if k.endswith('_id')}
-        
-        if len(devices) >= 16:
-            return False, "Maximum of 16 devices reached"
-        
-        # Check for duplicate index
-        existing_idx = [config['DEVICES'].get(f'device{i}_idx', '') 
-                       for i in range(1, 17) if f'device{i}_idx' in config['DEVICES']]
-        
-        if device_data['idx'] in existing_idx:
-            return False, f"Device index {device_data['idx']} is already in use"
-        
-        # Validate device data
+        # Validate device data first: bad form input needs no config read or lock
         if len(device_data['id']) != 8:
             return False, "Device ID must be exactly 8 characters long"
         if len(device_data['ns_key']) != 32:
             return False, "Network Section Key must be exactly 32 characters long"
         if len(device_data['app_key']) != 32:
             return False, "Application Section Key must be exactly 32 characters long"
+
+        with self._config_lock:
+            config = self._load_config()
+            devices = self._device_index(config)
         
-        # Add device
-        dev_num = len(devices) + 1
-        config['DEVICES'][f'device{dev_num}_idx'] = device_data['idx']
-        config['DEVICES'][f'device{dev_num}_id'] = device_data['id']
-        config['DEVICES'][f'device{dev_num}_ns_key'] = device_data['ns_key']
-        config['DEVICES'][f'device{dev_num}_app_key'] = device_data['app_key']
-        config['DEVICES'][f'device{dev_num}_ti'] = device_data['transmit_interval']
+            if len(devices) >= 16:
+                return False, "Maximum of 16 devices reached"
         
-        self.save_lora_config(config)
-        return True, "Device added successfully"
+            # Check for duplicate index
+            if any(device['idx'] == device_data['idx'] for device in devices.values()):
+                return False, f"Device index {device_data['idx']} is already in use"
+        
+            # Add device under the lowest free number (len + 1 can be taken after a delete)
+            dev_num = next(str(n) for n in range(1, 17) if str(n) not in devices)
+            section = config['DEVICES']
+            device = devices[dev_num] = {}
+            for field, data_key, suffix, _ in _DEVICE_FIELDS:
+                section[f'device{dev_num}{suffix}'] = device[field] = device_data[data_key]
+        
+            self._schedule_flush(config)
+            return True, "Device added successfully"
     
     def delete_devices(self, device_nums):
         """Delete LoRa devices"""
-        config = self.read_lora_config()
-        for device_num in device_nums:
-            for key in [f'device{device_num}_idx', f'device{device_num}_id',
-                       f'device{device_num}_ns_key', f'device{device_num}_app_key',
-                       f'device{device_num}_ti']:
-                if key in config['DEVICES']:
-                    del config['DEVICES'][key]
-        self.save_lora_config(config)
+        with self._config_lock:
+            config = self._load_config()
+            devices = self._device_index(config)
+            section = config['DEVICES']
+            for device_num in device_nums:
+                prefix = f'device{device_num}'
+                for _, _, suffix, _ in _DEVICE_FIELDS:
+                    section.pop(prefix + suffix, None)
+                devices.pop(str(device_num), None)
+            self._schedule_flush(config)
     
     def clear_devices(self):
         """Clear all devices"""
-        config = self.read_lora_config()
-        config['DEVICES'] = {}
-        self.save_lora_config(config)
\ No newline at end of file
+        with self._config_lock:
+            config = self._load_config()
+            config['DEVICES'] = {}
+            self._device_index_cache.pop(self.lora_file, None)
+            self._schedule_flush(config)
+
+
+def _install_sigterm_flush():
+    """Flush pending changes on SIGTERM too (a service stop): atexit doesn't run on an unhandled signal"""
+    previous = signal.getsignal(signal.SIGTERM)
+
+    def handler(signum, frame):
+        LoRaConfigManager.flush()
+        if callable(previous):
+            previous(signum, frame)
+        elif previous != signal.SIG_IGN:
+            raise SystemExit(128 + signum)
+
+    try:
+        signal.signal(signal.SIGTERM, handler)
+    except ValueError:
+        # Only the main thread can install handlers; atexit still covers normal exits
+        logger.debug("Not in the main thread, LoRa config flush not hooked to SIGTERM")
+
+
+# Don't lose changes still waiting for the debounce timer on shutdown
+atexit.register(LoRaConfigManager.flush)
+_install_sigterm_flush()
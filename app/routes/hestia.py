@@ -1,7 +1,9 @@
 """
 Routes for managing NTN dongle communication and NTN information pages.
 """
-from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
+import threading
+
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, make_response
 
 from app.models.hestia_manager import HestiaInfoManager
 #from app.models.hestia_operations import hestia
@@ -9,6 +11,26 @@ from app.utils.hestia_info import hestiaInfo
 
 hestia = Blueprint('hestia', __name__)
 _hestia_info_instance = None
+# Serializes start/stop (app startup and firmware updates both drive them)
+_hestia_info_lock = threading.Lock()
+
+def start_hestia_info():
+    """Start the Hestia info service (created on first use)"""
+    global _hestia_info_instance
+    with _hestia_info_lock:
+        if _hestia_info_instance is None:
+            _hestia_info_instance = hestiaInfo()
+        _hestia_info_instance.start()
+
+def stop_hestia_info():
+    """Stop the Hestia info service and release its dongle, returns True if it was running"""
+    global _hestia_info_instance
+    with _hestia_info_lock:
+        if _hestia_info_instance is None:
+            return False
+        _hestia_info_instance.stop()
+        _hestia_info_instance = None
+        return True
 
 @hestia.route('/')
 def index():
@@ -18,7 +40,6 @@ def index():
 @hestia.route('/hestia_info', methods=['GET', 'POST'])
 def hestia_info_page():
     """Hestia information page"""
-    global _hestia_info_instance
     if request.method == 'POST':
         if request.form.get('action') == 'update_serial':
             try:
@@ -31,18 +52,14 @@ def hestia_info_page():
             return redirect(url_for('hestia.hestia_info_page'))
         elif request.form.get('action') == 'start_hestia_info':
             try:
-                if _hestia_info_instance is None:
-                    _hestia_info_instance = hestiaInfo()
-                _hestia_info_instance.start()
+                start_hestia_info()
                 #flash('Hestia info collection started.')
             except Exception as e:
                 flash(f'Service start failed: {str(e)}')
             return redirect(url_for('hestia.hestia_info_page'))
         elif request.form.get('action') == 'stop_hestia_info':
             try:
-                if _hestia_info_instance:
-                    _hestia_info_instance.stop()
-                    _hestia_info_instance = None
+                stop_hestia_info()
                 #flash('Hestia info collection stopped.')
             except Exception as e:
                 flash(f'Service stop failed: {str(e)}')
@@ -59,10 +76,7 @@ def hestia_info_page():
             try:
                 hestia_manager = HestiaInfoManager()
                 # Clear the pending queue file
-                import os
-                queue_file = os.path.join(hestia_manager.run_dir, 'temp_data_queue.json')
-                if os.path.exists(queue_file):
-                    os.remove(queue_file)
+                hestia_manager.clear_upload_queue()
                 flash('Uplink queue cleared.')
             except Exception as e:
                 flash(f'Clear uplink queue failed: {str(e)}')
@@ -86,10 +100,18 @@ def hestia_info_page():
 def ntn_info_data():
     """NTN information data API endpoint"""
     hestia_manager = HestiaInfoManager()
-    hestia_info = hestia_manager.read_hestia_info()
-    file_hash = hestia_manager.get_file_hash()
-    return jsonify({
-        'hestia_info': hestia_info,
-        'hash': file_hash
-    })
+    # Conditional GET: nothing changed since the poller's cached copy -> 304, no read or JSON body
+    info_version = hestia_manager.get_info_version()
+    if info_version in request.if_none_match:
+        response = make_response('', 304)
+    else:
+        hestia_info = hestia_manager.read_hestia_info()
+        response = jsonify({
+            'hestia_info': hestia_info,
+            'hash': info_version
+        })
+    response.set_etag(info_version)
+    # Let the browser keep the body but revalidate on every poll
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
  
\ No newline at end of file
@@ -2,17 +2,24 @@
 Hestia Firmware Update Routes - Clean Version
 """
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash
+from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify, Response, stream_with_context
 from app.models.hestia_manager import HestiaInfoManager
 from app.models.hestia_operations import hestia
+from app.routes.hestia import start_hestia_info, stop_hestia_info
+import concurrent.futures
+import functools
+import json
 import logging
 import os
+import re
+import selectors
 import subprocess
 import sys
 import shutil
+import tempfile
 import threading
 import queue
-from time import sleep
+from time import monotonic, sleep, time
 
 logger = logging.getLogger(__name__)
 
@@ -27,8 +34,239 @@ firmware_update_status = {
     'success': None
 }
 
+# Guards firmware_update_status: written by the update thread, read by request handlers
+_status_lock = threading.Lock()
+
+# Queues of the clients connected to /hestia_fw_status_stream
+progress_subscribers = []
+_subscribers_lock = threading.Lock()
+# Seconds between keep-alive comments on an idle status stream
+STREAM_PING_INTERVAL = 30
+# Minimum seconds between progress updates published from the pymdfu output
+PROGRESS_EMIT_INTERVAL = 0.1
+# Seconds without pymdfu output after which the update is abandoned
+PYMDFU_IDLE_TIMEOUT = 120
+# Times (2 s apart) to try reconnecting to the device after flashing
+RECONNECT_ATTEMPTS = 30
+# Copy buffer size for streaming uploaded firmware to disk
+UPLOAD_CHUNK_SIZE = 1 << 20
+# Seconds after which a leftover firmware upload is swept
+UPLOAD_MAX_AGE = 24 * 3600
+# Seconds the firmware version shown on the update page is reused, and how long a page load waits for it
+FW_VERSION_TTL = 30.0
+FW_VERSION_TIMEOUT = 5.0
+
+# Last firmware version read from the dongle, and the read in flight as (future, start time)
+_fw_version_cache = {'version': None, 'port': None, 'ts': 0.0}
+_fw_version_read = None
+_fw_version_lock = threading.Lock()
+
+# Runs firmware updates one at a time; its worker is joined at interpreter exit,
+# so a clean shutdown waits for the device to finish flashing
+_update_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix='hestia-fw-update')
+
+def status_snapshot():
+    """Return a consistent copy of the firmware update status"""
+    with _status_lock:
+        return dict(firmware_update_status)
+
+def _claim_update():
+    """Mark a firmware update as started, returns False if one is already running"""
+    with _status_lock:
+        if firmware_update_status['in_progress']:
+            return False
+        firmware_update_status['in_progress'] = True
+    publish({
+        'progress': 0,
+        'status': 'Initializing firmware update...',
+        'result': 'Update in progress...',
+        'success': None
+    })
+    return True
+
+def publish(delta):
+    """Apply delta to the firmware update status, push the new status to every stream subscriber and return it"""
+    with _status_lock:
+        firmware_update_status.update(delta)
+        snapshot = dict(firmware_update_status)
+    with _subscribers_lock:
+        subscribers = list(progress_subscribers)
+    for q in subscribers:
+        while True:
+            try:
+                q.put_nowait(snapshot)
+                break
+            except queue.Full:
+                # Slow client: drop its oldest state (each one is complete) so the latest always arrives
+                try:
+                    q.get_nowait()
+                except queue.Empty:
+                    pass
+    return snapshot
+
+# pymdfu output markers, one named group per progress stage
+PYMDFU_OUTPUT_PATTERN = re.compile(
+    rb'(?P<init>ntn dongle init|password valid)'
+    rb'|(?P<closed>ntn dongle connection closed)'
+    rb'|(?P<start>using pymdfu command|starting mdfu file transfer)'
+    rb'|(?P<write_chunk>command:\s+write_chunk)'
+    rb'|(?P<verify>command:\s+get_image_state)'
+    rb'|(?P<done>ending mdfu file transfer|upgrade finished successfully)'
+    rb'|(?P<frame>sending frame|received a frame)',
+    re.IGNORECASE
+)
+
+def _iter_output_lines(process, idle_timeout=PYMDFU_IDLE_TIMEOUT):
+    """Yield the raw output lines of process, raising TimeoutError if it is silent for idle_timeout seconds"""
+    stdout = process.stdout
+    if sys.platform == 'win32':
+        # select() only handles sockets on Windows
+        yield from stdout
+        return
+
+    fd = stdout.fileno()
+    os.set_blocking(fd, False)
+    buffer = b''
+    with selectors.DefaultSelector() as selector:
+        selector.register(fd, selectors.EVENT_READ)
+        while True:
+            if not selector.select(timeout=idle_timeout):
+                raise TimeoutError(f'pymdfu produced no output for {idle_timeout} seconds')
+            try:
+                chunk = os.read(fd, 65536)
+            except BlockingIOError:
+                continue
+            if not chunk:
+                break
+            *lines, buffer = (buffer + chunk).split(b'\n')
+            yield from lines
+    if buffer:
+        yield buffer
+
+def _stage_handler(progress, status):
+    """Build a pymdfu output handler that jumps to a fixed progress stage"""
+    def handler(state):
+        state['progress'] = progress
+        return {'progress': progress, 'status': status}
+    return handler
+
+# Progress after the n-th WRITE_CHUNK (index n - 1), 50% to 85%.
+# From log analysis, WRITE_CHUNK starts from seq 2-24 (~23 chunks), plus padding: assume ~25 chunks
+WRITE_CHUNK_PROGRESS = tuple(50 + min((n * 35) // 25, 35) for n in range(1, 26))
+
+def _on_write_chunk(state):
+    """WRITE_CHUNK commands move the progress from 50% to 85%"""
+    state['write_count'] += 1
+    state['progress'] = WRITE_CHUNK_PROGRESS[min(state['write_count'], len(WRITE_CHUNK_PROGRESS)) - 1]
+    return {'progress': state['progress'], 'status': 'Writing firmware chunks...'}
+
+def _on_frame(state):
+    """Fallback for general progress during debug lines (sending/receiving frames)"""
+    if state['lines'] % 10 == 0 and state['progress'] < 80:
+        state['progress'] = min(state['progress'] + 0.2, 80)  # Slower increment for finer control
+        return {'progress': int(state['progress'])}
+    return None
+
+PYMDFU_OUTPUT_HANDLERS = {
+    'init': _stage_handler(40, 'Initializing dongle connection...'),
+    'closed': _stage_handler(45, 'Preparing for firmware transfer...'),
+    'start': _stage_handler(50, 'Starting MDFU transfer...'),
+    'write_chunk': _on_write_chunk,
+    'verify': _stage_handler(85, 'Verifying image state...'),
+    'done': _stage_handler(90, 'Firmware update completed successfully!'),
+    'frame': _on_frame,
+}
+
+def _firmware_upload_dir():
+    """Directory uploaded firmware images are stored in until the update finishes"""
+    return os.path.join(HestiaInfoManager().run_dir, 'firmware_uploads')
+
+def sweep_firmware_uploads(max_age=UPLOAD_MAX_AGE):
+    """Delete uploads older than max_age seconds left behind by interrupted updates"""
+    cutoff = time() - max_age
+    try:
+        entries = list(os.scandir(_firmware_upload_dir()))
+    except FileNotFoundError:
+        return
+    for entry in entries:
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+                logger.info(f"Removed stale firmware upload: {entry.name}")
+        except OSError as e:
+            logger.warning(f"Could not remove stale firmware upload {entry.name}: {e}")
+
+def _read_fw_version(serial_interface):
+    """Read the dongle firmware version into the cache, returns (status, version)"""
+    ntn_dongle = hestia(port=serial_interface, dl_callback=lambda d, l: None)
+    try:
+        if not ntn_dongle.set_password((0, 0, 0, 0)):
+            return 'failed', None
+        version = ntn_dongle.fw_ver()
+    finally:
+        ntn_dongle.stop()
+    # Cached here rather than by the caller, so a read that outlives its page load still counts
+    if version:
+        _fw_version_cache.update(version=version, port=serial_interface, ts=monotonic())
+    return 'success', version
+
+def _start_fw_version_read(serial_interface):
+    """Run _read_fw_version on a daemon thread, returns a Future for its result"""
+    future = concurrent.futures.Future()
+
+    def worker():
+        try:
+            future.set_result(_read_fw_version(serial_interface))
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=worker, daemon=True).start()
+    return future
+
+def get_fw_version(serial_interface):
+    """Firmware version for the update page, cached for FW_VERSION_TTL seconds"""
+    global _fw_version_read
+    cached = _fw_version_cache
+    if cached['version'] and cached['port'] == serial_interface and monotonic() - cached['ts'] < FW_VERSION_TTL:
+        return cached['version']
+
+    # The read runs on its own thread so a device stuck in bootloader mode can't hang the page.
+    # A read still pending is shared by later page loads, until it is older than FW_VERSION_TIMEOUT:
+    # then it is abandoned to its thread and a new one is started instead of waiting on it forever
+    with _fw_version_lock:
+        now = monotonic()
+        if _fw_version_read is None or _fw_version_read[0].done() or now - _fw_version_read[1] >= FW_VERSION_TIMEOUT:
+            logger.info("Starting firmware version check in background thread...")
+            _fw_version_read = (_start_fw_version_read(serial_interface), now)
+        future = _fw_version_read[0]
+    try:
+        status, version = future.result(timeout=FW_VERSION_TIMEOUT)
+    except concurrent.futures.TimeoutError:
+        logger.warning(f"Firmware version check timed out after {FW_VERSION_TIMEOUT} seconds")
+        return 'Unable to connect'
+    except Exception as e:
+        logger.warning(f"Worker thread exception: {e}")
+        return 'Unable to connect'
+    logger.info(f"Thread completed with status: {status}, result: {version}")
+
+    if status != 'success':
+        return 'Unable to connect'
+    return version or 'Version not available'
+
+def _is_executable(path):
+    """Return True if path exists and has an execute bit set (one stat call)"""
+    try:
+        return bool(os.stat(path).st_mode & 0o111)
+    except OSError:
+        return False
+
+@functools.lru_cache(maxsize=1)
 def find_pymdfu_executable():
-    """Find the pymdfu executable, handling virtual environments and cross-platform issues."""
+    """Find the pymdfu executable, handling virtual environments and cross-platform issues.
+
+    The result is cached for the process lifetime; it is a path, or a tuple of
+    arguments when pymdfu has to be run as a module.
+    """
     # For macOS/Linux virtual environments, try venv-specific paths first
     if sys.platform in ['darwin', 'linux']:
         # Check if we're in a virtual environment
@@ -37,13 +275,13 @@ def find_pymdfu_executable():
 
             # Try the virtual environment's bin directory
             venv_bin = os.path.join(sys.prefix, 'bin', 'pymdfu')
-            if os.path.exists(venv_bin) and os.access(venv_bin, os.X_OK):
+            if _is_executable(venv_bin):
                 logger.info(f"Found pymdfu in virtual environment: {venv_bin}")
                 return venv_bin
 
             # Also check the Scripts directory (some virtual envs use this)
             venv_scripts = os.path.join(sys.prefix, 'Scripts', 'pymdfu')
-            if os.path.exists(venv_scripts) and os.access(venv_scripts, os.X_OK):
+            if _is_executable(venv_scripts):
                 logger.info(f"Found pymdfu in virtual environment Scripts: {venv_scripts}")
                 return venv_scripts
 
@@ -80,7 +318,7 @@ def find_pymdfu_executable():
                               capture_output=True, text=True, timeout=10)
         if result.returncode == 0:
             logger.info("Successfully verified 'python -m pymdfu' works")
-            return [sys.executable, '-m', 'pymdfu']
+            return (sys.executable, '-m', 'pymdfu')
     except (subprocess.TimeoutExpired, subprocess.CalledProcessError, FileNotFoundError) as e:
         logger.warning(f"Failed to verify 'python -m pymdfu': {e}")
 
@@ -94,7 +332,7 @@ def find_pymdfu_executable():
         ]
 
         for path in common_paths:
-            if os.path.exists(path) and os.access(path, os.X_OK):
+            if _is_executable(path):
                 logger.info(f"Found pymdfu at common path: {path}")
                 return path
 
@@ -102,6 +340,204 @@ def find_pymdfu_executable():
     logger.warning("Could not find pymdfu executable, falling back to 'pymdfu' in PATH")
     return 'pymdfu'
 
+def run_firmware_update(serial_interface, filepath, update_mode):
+    """Flash the uploaded image with pymdfu and publish progress; the caller claims the update first"""
+    retry_mode = update_mode == 'bootloader'
+    info_was_running = False
+    try:
+        logger.info(f"Starting firmware update: {os.path.basename(filepath)}, Mode: {update_mode}")
+        _fw_version_cache['version'] = None
+        
+        # The info service holds its own reference to the shared port master, so the port
+        # only closes for pymdfu once it lets go as well
+        info_was_running = stop_hestia_info()
+        if info_was_running:
+            logger.info("Stopped Hestia info service for the firmware update")
+        
+        if not retry_mode:
+            publish({
+                'progress': 10,
+                'status': 'Preparing device for update...'
+            })
+            # Normal mode - put device into bootloader first
+            ntn_dongle = hestia(port=serial_interface, dl_callback=lambda d, l: None)
+            try:
+                validpasswd = ntn_dongle.set_password((0,0,0,0))
+                logger.info(f'Password valid: {validpasswd}')
+                
+                if not validpasswd:
+                    # Raised so the failure is published and the update claim released
+                    raise ValueError("Failed to initialize dongle")
+                
+                # Enable Engineering mode
+                ntn_dongle.ntn.set_register(0xFFD0, 0xAA55)
+                # Enable Bootloader Mode
+                ntn_dongle.ntn.set_register(0xD000, 0xAA55)
+                # Reset MCU
+                ntn_dongle.ntn.set_register(0xFD00, 0xAA55)
+                sleep(1)
+            finally:
+                # Close the Modbus connection to release the serial port, also when the handshake failed
+                ntn_dongle.stop()
+            sleep(0.5)
+        else:
+            logger.info("Retrying firmware update in bootloader mode")
+            sleep(0.5)
+        
+        # Find the correct pymdfu executable
+        pymdfu_cmd = find_pymdfu_executable()
+        logger.info(f'Using pymdfu command: {pymdfu_cmd}')
+        
+        publish({
+            'progress': 20,
+            'status': 'Connecting to device...'
+        })
+        
+        # Build command list - simplified
+        if isinstance(pymdfu_cmd, str):
+            pymdfu_cmd = (pymdfu_cmd,)
+        command = [
+            *pymdfu_cmd, "update",
+            "--tool", "serial",
+            "--port", serial_interface,
+            "--baudrate", '115200',
+            "--image", filepath,
+            "-v", "debug"
+        ]
+        
+        logger.info(f"Executing command: {' '.join(command)}")
+        
+        publish({
+            'progress': 30,
+            'status': 'Uploading firmware...'
+        })
+        
+        # Execute firmware update
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT
+        )
+        
+        # Log output in real-time and update progress
+        state = {'progress': 40, 'lines': 0, 'write_count': 0}
+        # Latest not yet published status change, merged across lines
+        pending = {}
+        last_emit = 0.0
+        last_stage = status_snapshot()['status']
+
+        try:
+            for line in _iter_output_lines(process):
+                state['lines'] += 1
+
+                # Update progress based on pymdfu output patterns, matched on the raw bytes
+                match = PYMDFU_OUTPUT_PATTERN.search(line)
+                if match and match.lastgroup == 'frame':
+                    # Per-frame chatter: only decoded when debug logging is on
+                    if logger.isEnabledFor(logging.DEBUG):
+                        logger.debug(line.rstrip().decode(errors='replace'))
+                else:
+                    logger.info(line.rstrip().decode(errors='replace'))
+                if match:
+                    delta = PYMDFU_OUTPUT_HANDLERS[match.lastgroup](state)
+                    if delta:
+                        pending.update(delta)
+
+                # Coalesce: publish on a stage change, otherwise at most every PROGRESS_EMIT_INTERVAL
+                if pending:
+                    now = monotonic()
+                    if pending.get('status', last_stage) != last_stage or now - last_emit > PROGRESS_EMIT_INTERVAL:
+                        last_stage = publish(pending)['status']
+                        last_emit = now
+                        pending = {}
+        except TimeoutError:
+            process.kill()
+            process.wait()
+            raise
+
+        # Flush whatever the throttle held back
+        if pending:
+            publish(pending)
+
+        publish({
+            'progress': 90,
+            'status': 'Finalizing update...'
+        })
+        
+        return_code = process.wait()
+        if return_code != 0:
+            logger.error(f"Firmware update failed with return code: {return_code}")
+            publish({
+                'in_progress': False,
+                'progress': 0,
+                'status': 'Update failed',
+                'result': f'ERROR: Firmware update failed with return code {return_code}',
+                'success': False
+            })
+        else:
+            logger.info("Firmware update completed successfully!")
+            
+            # Get updated MCU firmware version after successful update
+            mcu_fw_version = 'Unknown'
+            ntn_dongle = None
+            try:
+                # Wait a moment for device to restart after firmware update
+                sleep(2)
+                ntn_dongle = hestia(port=serial_interface, dl_callback=lambda d, l: None)
+                # Bounded, so a device that never comes back still ends the update
+                for _ in range(RECONNECT_ATTEMPTS):
+                    if ntn_dongle.set_password((0, 0, 0, 0)) is not False:
+                        mcu_fw_version = ntn_dongle.fw_ver() or 'Unable to retrieve'
+                        break
+                    logger.info("Waiting for device to reconnect...")
+                    sleep(2)
+                else:
+                    mcu_fw_version = 'Unable to retrieve'
+                logger.info(f"Updated MCU firmware version: {mcu_fw_version}")
+                if mcu_fw_version != 'Unable to retrieve':
+                    _fw_version_cache.update(version=mcu_fw_version, port=serial_interface, ts=monotonic())
+            except Exception as e:
+                logger.warning(f"Could not retrieve updated MCU firmware version: {e}")
+                mcu_fw_version = 'Unable to retrieve'
+            
+            publish({
+                'in_progress': False,
+                'progress': 100,
+                'status': 'Update completed',
+                'result': f'SUCCESS: Firmware updated successfully. New MCU firmware version: {mcu_fw_version}',
+                'success': True,
+                'new_fw_version': mcu_fw_version
+            })
+            
+            # Torn down only once the result is published, so nothing here can hold the update claim
+            if ntn_dongle:
+                try:
+                    ntn_dongle.stop()
+                except Exception as e:
+                    logger.warning(f"Could not close the connection to the updated device: {e}")
+            
+    except Exception as e:
+        logger.error(f"Firmware update exception: {str(e)}")
+        publish({
+            'in_progress': False,
+            'progress': 0,
+            'status': 'Update failed',
+            'result': f'ERROR: {str(e)}',
+            'success': False
+        })
+    finally:
+        # The image is uploaded again for every attempt, don't keep it around
+        try:
+            os.unlink(filepath)
+        except FileNotFoundError:
+            pass
+        if info_was_running:
+            try:
+                start_hestia_info()
+                logger.info("Restarted Hestia info service after the firmware update")
+            except Exception as e:
+                logger.error(f"Could not restart Hestia info service: {e}")
+
 @hestia_fw.route('/hestia_fw_update', methods=['GET', 'POST'])
 def hestia_fw_update_page():
     """Hestia Firmware Update page"""
@@ -131,225 +567,54 @@ def hestia_fw_update_page():
                 
                 # Get update mode option
                 update_mode = request.form.get('update_mode', 'normal')
-                retry_mode = update_mode == 'bootloader'
-               
-                                # Initialize hestia manager
+
+                # One update at a time: a second one would overwrite the image and fight over the port
+                if not _claim_update():
+                    flash('A firmware update is already in progress.')
+                    return redirect(url_for('hestia_fw.hestia_fw_update_page'))
+            except Exception as e:
+                flash(f'Firmware update failed: {str(e)}')
+                logger.error(f"Firmware update error: {str(e)}")
+                return redirect(url_for('hestia_fw.hestia_fw_update_page'))
+
+            try:
+                # Initialize hestia manager
                 hestia_manager = HestiaInfoManager()
 
                 # Save uploaded file temporarily with secure filename
                 from werkzeug.utils import secure_filename
-                upload_dir = os.path.join(hestia_manager.run_dir, 'firmware_uploads')
+                upload_dir = _firmware_upload_dir()
                 os.makedirs(upload_dir, exist_ok=True)
 
                 filename = secure_filename(file.filename)
                 filepath = os.path.join(upload_dir, filename)
-                file.save(filepath)
+                # Stream to a temp file next to the target in 1 MiB chunks, then swap it in
+                fd, tmp_path = tempfile.mkstemp(dir=upload_dir, suffix='_' + filename)
+                try:
+                    with os.fdopen(fd, 'wb') as out:
+                        shutil.copyfileobj(file.stream, out, length=UPLOAD_CHUNK_SIZE)
+                    os.replace(tmp_path, filepath)
+                except BaseException:
+                    os.unlink(tmp_path)
+                    raise
                 
                 # Get serial interface
                 serial_interface = hestia_manager.read_hestia_info().get('serial_interface', '/dev/ttyUSB0')
                 
-                # Start firmware update in background thread
-                def firmware_update_background():
-                    global firmware_update_status
-                    try:
-                        firmware_update_status.update({
-                            'in_progress': True,
-                            'progress': 0,
-                            'status': 'Initializing firmware update...',
-                            'result': 'Update in progress...',
-                            'success': None
-                        })
-                        
-                        logger.info(f"Starting firmware update: {filename}, Mode: {update_mode}")
-                        
-                        if not retry_mode:
-                            firmware_update_status.update({
-                                'progress': 10,
-                                'status': 'Preparing device for update...'
-                            })
-                            # Normal mode - put device into bootloader first
-                            ntn_dongle = hestia(port=serial_interface, dl_callback=lambda d, l: None)
-                            validpasswd = ntn_dongle.set_password((0,0,0,0))
-                            logger.info(f'Password valid: {validpasswd}')
-                            
-                            if not validpasswd:
-                                logger.error("Failed to initialize dongle")
-                                return
-                            
-                            # Enable Engineering mode
-                            ntn_dongle.ntn.set_register(0xFFD0, 0xAA55)
-                            # Enable Bootloader Mode
-                            ntn_dongle.ntn.set_register(0xD000, 0xAA55)
-                            # Reset MCU
-                            ntn_dongle.ntn.set_register(0xFD00, 0xAA55)
-                            sleep(1)
-                            
-                            # Close the Modbus connection to release the serial port
-                            ntn_dongle.stop()
-                            sleep(0.5)
-                        else:
-                            logger.info("Retrying firmware update in bootloader mode")
-                            sleep(0.5)
-                        
-                        # Find the correct pymdfu executable
-                        pymdfu_cmd = find_pymdfu_executable()
-                        logger.info(f'Using pymdfu command: {pymdfu_cmd}')
-                        
-                        firmware_update_status.update({
-                            'progress': 20,
-                            'status': 'Connecting to device...'
-                        })
-                        
-                        # Build command list - simplified
-                        command = [
-                            pymdfu_cmd, "update",
-                            "--tool", "serial",
-                            "--port", serial_interface,
-                            "--baudrate", '115200',
-                            "--image", filepath,
-                            "-v", "debug"
-                        ]
-                        
-                        logger.info(f"Executing command: {' '.join(command)}")
-                        
-                        firmware_update_status.update({
-                            'progress': 30,
-                            'status': 'Uploading firmware...'
-                        })
-                        
-                        # Execute firmware update
-                        process = subprocess.Popen(
-                            command,
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.STDOUT,
-                            text=True,
-                            universal_newlines=True
-                        )
-                        
-                        # Log output in real-time and update progress
-                        progress = 40
-                        total_lines = 0
-                        lines_processed = 0
-                        
-                        for line in process.stdout:
-                            logger.info(line.rstrip())
-                            lines_processed += 1
-                            
-                            # Update progress based on pymdfu output patterns
-                            line_lower = line.lower()
-                            # Connection and initialization phase
-                            if 'ntn dongle init' in line_lower or 'password valid' in line_lower:
-                                progress = 40
-                                firmware_update_status.update({
-                                    'progress': progress,
-                                    'status': 'Initializing dongle connection...'
-                                })
-                            elif 'ntn dongle connection closed' in line_lower:
-                                progress = 45
-                                firmware_update_status.update({
-                                    'progress': progress,
-                                    'status': 'Preparing for firmware transfer...'
-                                })
-                            elif 'using pymdfu command' in line_lower or 'starting mdfu file transfer' in line_lower:
-                                progress = 50
-                                firmware_update_status.update({
-                                    'progress': progress,
-                                    'status': 'Starting MDFU transfer...'
-                                })
-                            
-                            # Writing phase: Detect WRITE_CHUNK commands and increment based on sequence or count
-                            # From log analysis, WRITE_CHUNK starts from seq 2-24 (~23 chunks), progress 50-85%
-                            elif 'command:         write_chunk' in line_lower:
-                                # Assuming ~25 chunks based on log (seq 2 to 24, plus padding)
-                                write_count = write_count + 1 if 'write_count' in locals() else 1
-                                progress = 50 + min((write_count / 25.0) * 35, 35)  # Scale to reach ~85%
-                                firmware_update_status.update({
-                                    'progress': int(progress),
-                                    'status': 'Writing firmware chunks...'
-                                })
-                            # Verification phase: GET_IMAGE_STATE is like verify
-                            elif 'command:         get_image_state' in line_lower:
-                                progress = 85
-                                firmware_update_status.update({
-                                    'progress': progress,
-                                    'status': 'Verifying image state...'
-                                })
-                            
-                            # End transfer and success
-                            elif 'ending mdfu file transfer' in line_lower or 'upgrade finished successfully' in line_lower:
-                                progress = 90
-                                firmware_update_status.update({
-                                    'progress': progress,
-                                    'status': 'Firmware update completed successfully!'
-                                })
-                            # Fallback for general progress during debug lines (e.g., sending/receiving frames)
-                            elif ('sending frame' in line_lower or 'received a frame' in line_lower) and lines_processed % 10 == 0:
-                                if progress < 80:
-                                    progress = min(progress + 0.2, 80)  # Slower increment for finer control
-                                    firmware_update_status['progress'] = int(progress)    
-
-                        firmware_update_status.update({
-                            'progress': 90,
-                            'status': 'Finalizing update...'
-                        })
-                        
-                        return_code = process.wait()
-                        if return_code != 0:
-                            logger.error(f"Firmware update failed with return code: {return_code}")
-                            firmware_update_status.update({
-                                'in_progress': False,
-                                'progress': 0,
-                                'status': 'Update failed',
-                                'result': f'ERROR: Firmware update failed with return code {return_code}',
-                                'success': False
-                            })
-                        else:
-                            logger.info("Firmware update completed successfully!")
-                            
-                            # Get updated MCU firmware version after successful update
-                            mcu_fw_version = 'Unknown'
-                            try:
-                                # Wait a moment for device to restart after firmware update
-                                sleep(2)
-                                ntn_dongle = hestia(port=serial_interface, dl_callback=lambda d, l: None)
-                                while ntn_dongle.set_password((0, 0, 0, 0)) is False:
-                                    logger.info("Waiting for device to reconnect...")
-                                    sleep(2)
-                                else:
-                                    mcu_fw_version = ntn_dongle.fw_ver() or 'Unable to retrieve'
-                                ntn_dongle.stop()
-                                logger.info(f"Updated MCU firmware version: {mcu_fw_version}")
-                            except Exception as e:
-                                logger.warning(f"Could not retrieve updated MCU firmware version: {e}")
-                                mcu_fw_version = 'Unable to retrieve'
-                            
-                            firmware_update_status.update({
-                                'in_progress': False,
-                                'progress': 100,
-                                'status': 'Update completed',
-                                'result': f'SUCCESS: Firmware updated successfully. New MCU firmware version: {mcu_fw_version}',
-                                'success': True,
-                                'new_fw_version': mcu_fw_version
-                            })
-                            
-                    except Exception as e:
-                        logger.error(f"Firmware update exception: {str(e)}")
-                        firmware_update_status.update({
-                            'in_progress': False,
-                            'progress': 0,
-                            'status': 'Update failed',
-                            'result': f'ERROR: {str(e)}',
-                            'success': False
-                        })
-                
-                # Start background thread and return immediately
-                update_thread = threading.Thread(target=firmware_update_background, daemon=True)
-                update_thread.start()
+                # Run the update on the update worker and return immediately
+                _update_executor.submit(run_firmware_update, serial_interface, filepath, update_mode)
                 
                 # Return response immediately to prevent loading state
                 #flash(f'Firmware update started with file: {filename}. Update mode: {update_mode.title()}. Monitor progress below.')
                 
             except Exception as e:
+                # The update never started, release the claim
+                publish({
+                    'in_progress': False,
+                    'status': 'Update failed',
+                    'result': f'ERROR: {str(e)}',
+                    'success': False
+                })
                 flash(f'Firmware update failed: {str(e)}')
                 logger.error(f"Firmware update error: {str(e)}")
             
@@ -363,56 +628,11 @@ def hestia_fw_update_page():
     fw_version = 'Not available'
     try:
         serial_interface = hestia_info.get('serial_interface', '/dev/ttyUSB0')
-
-        # Use threading-based timeout to prevent hanging if device is in bootloader mode
-
-        def get_firmware_version_worker(q, serial_interface):
-            """Worker function to get firmware version in separate thread"""
-            try:
-                ntn_dongle = hestia(port=serial_interface, dl_callback=lambda d, l: None)
-
-                if ntn_dongle.set_password((0, 0, 0, 0)):
-                    retrieved_version = ntn_dongle.fw_ver()
-                    if retrieved_version:
-                        q.put(('success', retrieved_version))
-                    else:
-                        q.put(('success', None))
-                else:
-                    q.put(('failed', None))
-
-                ntn_dongle.stop()
-            except Exception as e:
-                logger.warning(f"Worker thread exception: {e}")
-                q.put(('error', str(e)))
-
-        # Create queue for thread communication
-        result_queue = queue.Queue()
-
-        # Start worker thread
-        logger.info("Starting firmware version check in background thread...")
-        worker_thread = threading.Thread(
-            target=get_firmware_version_worker,
-            args=(result_queue, serial_interface),
-            daemon=True
-        )
-        worker_thread.start()
-
-        # Wait for result with timeout
-        try:
-            status, result = result_queue.get(timeout=5.0)  # 5-second timeout
-            logger.info(f"Thread completed with status: {status}, result: {result}")
-
-            if status == 'success' and result:
-                fw_version = result
-            elif status == 'success':
-                fw_version = 'Version not available'
-            else:
-                fw_version = 'Unable to connect'
-
-        except queue.Empty:
-            logger.warning("Firmware version check timed out after 5 seconds")
-            fw_version = 'Unable to connect'
-
+        if status_snapshot()['in_progress']:
+            # The port belongs to pymdfu until the update is done
+            fw_version = _fw_version_cache['version'] or 'Update in progress'
+        else:
+            fw_version = get_fw_version(serial_interface)
     except Exception as e:
         logger.warning(f"Failed to get FW version on page load: {e}")
         fw_version = 'Unable to connect'
@@ -422,6 +642,46 @@ def hestia_fw_update_page():
 @hestia_fw.route('/hestia_fw_status', methods=['GET'])
 def firmware_update_status_api():
     """API endpoint to get current firmware update status"""
-    global firmware_update_status
-    return firmware_update_status
-
+    return jsonify(status_snapshot())
+
+@hestia_fw.route('/hestia_fw_status_stream', methods=['GET'])
+def firmware_update_status_stream():
+    """Server-sent event stream of firmware update status changes"""
+    def gen():
+        # Registered here, not in the view: a response that is never iterated never reaches
+        # the finally below, and its queue would stay subscribed
+        q = queue.Queue(maxsize=100)
+        with _subscribers_lock:
+            progress_subscribers.append(q)
+        try:
+            # Current state first so the client doesn't wait for the next change
+            yield f"data: {json.dumps(status_snapshot())}\n\n"
+            while True:
+                try:
+                    status = q.get(timeout=STREAM_PING_INTERVAL)
+                except queue.Empty:
+                    yield ": ping\n\n"
+                    continue
+                yield f"data: {json.dumps(status)}\n\n"
+        finally:
+            with _subscribers_lock:
+                progress_subscribers.remove(q)
+
+    response = Response(stream_with_context(gen()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _warm_up():
+    """Startup work kept off the request path"""
+    # Resolve pymdfu so the first update doesn't wait on the probes
+    find_pymdfu_executable()
+    sweep_firmware_uploads()
+
+@hestia_fw.record_once
+def _start_warm_up(state):
+    """Run _warm_up in the background once the blueprint is registered on a serving app"""
+    app = state.app
+    # Not for test apps, nor for the reloader's watcher process (only its child serves requests)
+    if app.testing or (app.debug and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'):
+        return
+    threading.Thread(target=_warm_up, daemon=True).start()
@@ -89,7 +89,7 @@ def lora_page():
                     try:
                         with open(progress_file, 'w') as f:
                             json.dump(progress_data, f)
-                    except:
+                    except OSError:
                         pass
                 
                 def setup_thread():
@@ -151,7 +151,7 @@ def lora_page():
                     try:
                         with open(progress_file, 'w') as f:
                             json.dump(progress_data, f)
-                    except:
+                    except OSError:
                         pass
 
                 def setup_thread():
@@ -2,7 +2,6 @@
 LoRa device setup utility functions
 """
 import binascii
-import configparser
 import json
 import logging
 import os
@@ -22,7 +21,7 @@ def dl_callback(data, d_len):
         logger.info(f'dl_callback: {d_len}, {data}')
         hestia_manager = HestiaInfoManager()
         # Store the downlink message
-        hestia_manager.add_downlink_message(data.decode('utf-8') if isinstance(data, bytes) else str(data), d_len)
+        hestia_manager.add_downlink_message(data, d_len)
         # Try to parse the hex data and check for trigger keys
         try:
             dl_data = json.loads(binascii.unhexlify(data).decode('utf-8'))
@@ -68,6 +67,12 @@ class hestiaInfo(ConfigManager):
             logger.info(f"Dongle connected successfully on {ser_interface}")
         except Exception as e:
             logger.error(f"Failed to connect to dongle: {str(e)}")
+            if self.ntn_dongle:
+                # Release its thread and the shared Modbus master reference
+                try:
+                    self.ntn_dongle.stop()
+                except Exception as stop_error:
+                    logger.error(f"Error stopping NTN dongle: {stop_error}")
             self.ntn_dongle = None
             
     def start(self):
@@ -102,37 +107,28 @@ class hestiaInfo(ConfigManager):
                 self.ntn_dongle = None
 
     def write_to_ini(self):
-        # Read existing config or create new one
-        config = configparser.ConfigParser()
-        if os.path.exists(self.hestia_info_file):
-            config.read(self.hestia_info_file)
-
-        # Ensure ntn-info section exists
-        if 'ntn-info' not in config:
-            config['ntn-info'] = {}
-        if 'lora-info' not in config:
-            config['lora-info'] = {}
-
-        # Update with current NTN info
-        config['ntn-info']['imsi'] = self.hestia_info.get('imsi', '')
+        # Update through the shared manager so its parsed-config cache stays warm
         network = self.hestia_info.get('network_info', {})
-        config['ntn-info']['rsrp'] = str(network.get('rsrp', ''))
-        config['ntn-info']['sinr'] = str(network.get('sinr', ''))
         gps = self.hestia_info.get('gps_info', {})
-        config['ntn-info']['longitude'] = str(gps.get('longitude', ''))
-        config['ntn-info']['latitude'] = str(gps.get('latitude', ''))
-        config['ntn-info']['ntn-status'] = str(self.hestia_info.get('module_status', ''))
-        config['ntn-info']['last-update'] = str(self.hestia_info.get('last-update', ''))
-        
-        config['lora-info']['devaddr'] = self.hestia_info.get('lora-info', {}).get('devAddr', '')
-        config['lora-info']['data'] = self.hestia_info.get('lora-info', {}).get('data', '')
-        config['lora-info']['rssi'] = self.hestia_info.get('lora-info', {}).get('rssi', '')
-        config['lora-info']['snr'] = self.hestia_info.get('lora-info', {}).get('snr', '')
-        config['lora-info']['last-update'] = self.hestia_info.get('lora-info', {}).get('last-update', '')
-
-        # Write to file
-        with open(self.hestia_info_file, 'w') as f:
-            config.write(f)
+        lora_info = self.hestia_info.get('lora-info', {})
+        self.hestia_manager.update_info_sections({
+            'ntn-info': {
+                'imsi': self.hestia_info.get('imsi', ''),
+                'rsrp': str(network.get('rsrp', '')),
+                'sinr': str(network.get('sinr', '')),
+                'longitude': str(gps.get('longitude', '')),
+                'latitude': str(gps.get('latitude', '')),
+                'ntn-status': str(self.hestia_info.get('module_status', '')),
+                'last-update': str(self.hestia_info.get('last-update', ''))
+            },
+            'lora-info': {
+                'devaddr': lora_info.get('devAddr', ''),
+                'data': lora_info.get('data', ''),
+                'rssi': lora_info.get('rssi', ''),
+                'snr': lora_info.get('snr', ''),
+                'last-update': lora_info.get('last-update', '')
+            }
+        })
 
     def update_info(self):
         while self.running:
@@ -159,9 +155,9 @@ class hestiaInfo(ConfigManager):
                         self.hestia_info['gps_info'] = gps_info
                         self.hestia_info['last-update'] = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
                         
-                    devices = LoRaConfigManager().get_devices_data()
-                    logger.info(f"LoRa Devices: {devices}")
-                    if len(devices) > 0:
+                    device_count = LoRaConfigManager().device_count()
+                    logger.info(f"LoRa Devices: {device_count}")
+                    if device_count > 0:
                         data = self.ntn_dongle.pcie2_cmd('AT+BISGET=?')
                         logger.info(f'{data=}')
                         
@@ -128,6 +128,8 @@ def setup_lora_devices(config_manager, progress_callback=None):
 
     finally:
         if ntn_dongle:
+            # Stop the monitor thread and drop this setup's reference to the shared port
+            ntn_dongle.stop()
             ntn_dongle = None
 
         final_message = "Setup completed successfully" if not failed_devices else f"Setup completed with {len(failed_devices)} failed devices"
@@ -225,6 +227,8 @@ def setup_lora(config_manager, progress_callback=None):
         update_progress(95, f"Setup failed: {str(e)}")
     finally:
         if ntn_dongle:
+            # Stop the monitor thread and drop this setup's reference to the shared port
+            ntn_dongle.stop()
             ntn_dongle = None
 
         final_message = "Setup completed successfully" if setup_status.startswith("Setup completed") else f"Setup failed: {setup_status}"
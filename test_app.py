@@ -5,10 +5,52 @@ Simple test script for LoRa Setup Application
 
 import sys
 import os
+import tempfile
+from contextlib import contextmanager
 
 # Add the app directory to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
+@contextmanager
+def temp_hestia_manager():
+    """The HestiaInfoManager singleton pointed at a temporary directory for the block"""
+    from app.models.hestia_manager import HestiaInfoManager
+
+    manager = HestiaInfoManager()
+    names = ('hestia_info_file', 'temp_queue_file', 'downlink_messages_file', 'uplink_messages_file')
+    saved = {name: getattr(manager, name) for name in names}
+
+    def reset_caches():
+        manager._cached_config = manager._cached_stat = None
+        manager._cached_info = manager._cached_info_stat = None
+        manager._cached_messages = {}
+        manager._queue_entry_count = None
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, path in saved.items():
+            setattr(manager, name, os.path.join(tmp_dir, os.path.basename(path)))
+        reset_caches()
+        try:
+            yield manager
+        finally:
+            for name, path in saved.items():
+                setattr(manager, name, path)
+            reset_caches()
+
+@contextmanager
+def temp_lora_manager():
+    """A LoRaConfigManager working on a lora.ini in a temporary directory"""
+    from app.models.lora_manager import LoRaConfigManager
+
+    manager = LoRaConfigManager()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        manager.lora_file = os.path.join(tmp_dir, 'lora.ini')
+        try:
+            yield manager
+        finally:
+            # Write pending changes while the directory still exists
+            LoRaConfigManager.flush()
+
 def test_imports():
     """Test that all modules can be imported"""
     try:
@@ -52,6 +94,264 @@ def test_config_manager():
         print(f"❌ Config manager error: {e}")
         return False
 
+def test_fast_ini_round_trip():
+    """Test that fast_ini reads configparser output the same way configparser does"""
+    try:
+        import configparser
+        from app.models import fast_ini
+
+        config = configparser.ConfigParser(interpolation=None)
+        config['ntn-info'] = {'IMSI': '001010123456789', 'rsrp': '-95', 'last-update': '2024-01-01 12:00:00', 'sinr': ''}
+        config['lora-info'] = {'devAddr': '01ABCDEF', 'data': 'a=b;c', 'snr': '7.5'}
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'hestia_info.ini')
+            with open(path, 'w') as f:
+                config.write(f)
+            parsed = fast_ini.parse(path)
+            reread = configparser.ConfigParser(interpolation=None)
+            reread.read(path)
+
+        expected = {name: dict(reread[name]) for name in reread.sections()}
+        assert parsed == expected, f"{parsed} != {expected}"
+        print("✅ fast_ini matches configparser")
+        return True
+    except Exception as e:
+        print(f"❌ fast_ini error: {e}")
+        return False
+
+def test_hestia_info_cache():
+    """Test that read_hestia_info reuses its parse until hestia_info.ini changes"""
+    try:
+        with temp_hestia_manager() as manager:
+            manager.update_info_sections({'ntn-info': {'imsi': '111'}})
+            first = manager.read_hestia_info()
+            cached = manager._cached_info
+            manager.read_hestia_info()
+            assert manager._cached_info is cached, "unchanged file was parsed again"
+
+            # Another process rewrites the file
+            with open(manager.hestia_info_file) as f:
+                text = f.read()
+            with open(manager.hestia_info_file, 'w') as f:
+                f.write(text.replace('imsi = 111', 'imsi = 22222'))
+            second = manager.read_hestia_info()
+            assert (first['imsi'], second['imsi']) == ('111', '22222'), (first['imsi'], second['imsi'])
+
+        print("✅ Hestia info cache follows file changes")
+        return True
+    except Exception as e:
+        print(f"❌ Hestia info cache error: {e}")
+        return False
+
+def test_message_log_trim():
+    """Test that trimming a message log with long entries keeps three whole messages"""
+    try:
+        import json
+
+        with temp_hestia_manager() as manager:
+            # Entries over ~2.7KB: three of them no longer fit the fixed tail window
+            for i in range(6):
+                manager.add_downlink_message('x' * 3000 + str(i), 3001)
+            with open(manager.downlink_messages_file) as f:
+                logged = [json.loads(line)['data'][-1] for line in f]
+            assert logged == ['3', '4', '5'], logged
+
+            manager._cached_messages = {}
+            recent = [m['data'][-1] for m in manager.read_hestia_info()['downlink_messages']]
+            assert recent == ['5', '4', '3'], recent
+
+        print("✅ Message log trim keeps whole entries")
+        return True
+    except Exception as e:
+        print(f"❌ Message log trim error: {e}")
+        return False
+
+def test_message_window_slide():
+    """Test that the cached newest-3 message window slides on append and matches a fresh read"""
+    try:
+        with temp_hestia_manager() as manager:
+            for data in ('a', 'b', 'c'):
+                manager.add_downlink_message(data, 1)
+            path = manager.downlink_messages_file
+            assert [m['data'] for m in manager._read_recent_messages(path)] == ['c', 'b', 'a']
+
+            manager.add_downlink_message('d', 1)
+            slid = [m['data'] for m in manager._read_recent_messages(path)]
+            manager._cached_messages = {}
+            fresh = [m['data'] for m in manager._read_recent_messages(path)]
+            assert slid == fresh == ['d', 'c', 'b'], (slid, fresh)
+
+        print("✅ Message window slides on append")
+        return True
+    except Exception as e:
+        print(f"❌ Message window error: {e}")
+        return False
+
+def test_upload_queue_cycle():
+    """Test that a sent batch is removed from the upload queue and the rest stays queued"""
+    try:
+        with temp_hestia_manager() as manager:
+            for i in range(3):
+                assert manager._write_to_queue_file(f'{{"n": {i}}}', f"Queued at t{i}")
+            assert manager._queue_size() == 3, manager._queue_size()
+
+            batch = manager._drain_queue(max_batch=2)
+            assert [data for data, _ in batch] == [{'n': 0}, {'n': 1}], batch
+            # Appended while the batch was being sent: must survive the removal
+            manager._write_to_queue_file('{"n": 3}', "Queued at t3")
+            assert manager._remove_from_queue([raw for _, raw in batch])
+
+            remaining = [data for data, _ in manager._drain_queue()]
+            assert remaining == [{'n': 2}, {'n': 3}], remaining
+            assert manager._queue_size() == 2, manager._queue_size()
+
+            manager.clear_upload_queue()
+            assert manager._drain_queue() == [] and manager._queue_size() == 0
+
+        print("✅ Upload queue append/remove cycle working")
+        return True
+    except Exception as e:
+        print(f"❌ Upload queue error: {e}")
+        return False
+
+def test_queue_size_external_append():
+    """Test that the tracked queue size notices entries written by another process"""
+    try:
+        with temp_hestia_manager() as manager:
+            manager._write_to_queue_file('{"n": 0}', "Queued at t0")
+            assert manager._queue_size() == 1, manager._queue_size()
+            # Plain append, bypassing this process's writers
+            with open(manager.temp_queue_file, 'a') as f:
+                f.write('// Queued at t1\n{"n": 1}\n')
+            assert manager._queue_size() == 2, manager._queue_size()
+
+        print("✅ Queue size follows external writers")
+        return True
+    except Exception as e:
+        print(f"❌ Queue size error: {e}")
+        return False
+
+def test_lora_device_numbers():
+    """Test that new devices take the lowest free device number"""
+    try:
+        with temp_lora_manager() as manager:
+            for idx in range(3):
+                ok, message = manager.add_device({
+                    'idx': str(idx), 'id': f'0000000{idx}', 'ns_key': '0' * 32,
+                    'app_key': '1' * 32, 'transmit_interval': '60'
+                })
+                assert ok, message
+            manager.delete_devices(['2'])
+            assert sorted(manager.get_devices_data()) == ['1', '3']
+
+            ok, message = manager.add_device({
+                'idx': '0', 'id': 'FFFFFFFF', 'ns_key': '0' * 32, 'app_key': '1' * 32, 'transmit_interval': '60'
+            })
+            assert not ok, "duplicate index accepted"
+            ok, message = manager.add_device({
+                'idx': '9', 'id': 'FFFFFFFF', 'ns_key': '0' * 32, 'app_key': '1' * 32, 'transmit_interval': '60'
+            })
+            assert ok, message
+            devices = manager.get_devices_data()
+            assert devices['2']['id'] == 'FFFFFFFF' and manager.device_count() == 3, devices
+
+        print("✅ LoRa device numbering working")
+        return True
+    except Exception as e:
+        print(f"❌ LoRa device numbering error: {e}")
+        return False
+
+def test_lora_debounced_flush():
+    """Test that debounced lora.ini changes are visible at once and written by flush()"""
+    try:
+        import configparser
+        from app.models.lora_manager import LoRaConfigManager
+
+        with temp_lora_manager() as manager:
+            manager.update_lora_settings('923', '7', 'AS923')
+            assert manager.get_lora_data()['frequency'] == '923'
+
+            LoRaConfigManager.flush()
+            on_disk = configparser.ConfigParser(interpolation=None)
+            on_disk.read(manager.lora_file)
+            assert on_disk['LORA']['frequency'] == '923', dict(on_disk['LORA'])
+
+        print("✅ LoRa debounced flush working")
+        return True
+    except Exception as e:
+        print(f"❌ LoRa debounced flush error: {e}")
+        return False
+
+def test_lora_config_copy():
+    """Test that read_lora_config hands out a copy the cached config doesn't share"""
+    try:
+        with temp_lora_manager() as manager:
+            config = manager.read_lora_config()
+            config['DEVICES']['device1_id'] = '00000001'
+            config['LORA']['frequency'] = '868'
+            assert manager.device_count() == 0, manager.device_count()
+            assert manager.get_lora_data()['frequency'] == '', manager.get_lora_data()
+
+        print("✅ LoRa config copies are independent")
+        return True
+    except Exception as e:
+        print(f"❌ LoRa config copy error: {e}")
+        return False
+
+def test_hestia_info_etag():
+    """Test that an unchanged /hestia_info_data poll is answered with 304"""
+    try:
+        from app import create_app
+        from app.config.settings import config
+
+        app = create_app(config['testing'])
+        with temp_hestia_manager() as manager, app.test_client() as client:
+            # The first read writes the default hestia_info.ini, which changes the version
+            manager.read_hestia_info()
+            first = client.get('/hestia_info_data')
+            etag = first.headers['ETag']
+            assert first.status_code == 200 and first.get_json()['hash'] in etag
+
+            repeat = client.get('/hestia_info_data', headers={'If-None-Match': etag})
+            assert repeat.status_code == 304 and not repeat.data, repeat.status_code
+
+            manager.add_downlink_message('abcd', 2)
+            changed = client.get('/hestia_info_data', headers={'If-None-Match': etag})
+            assert changed.status_code == 200 and changed.headers['ETag'] != etag
+            assert changed.get_json()['hestia_info']['downlink_messages'][0]['data'] == 'abcd'
+
+        print("✅ Hestia info ETag/304 working")
+        return True
+    except Exception as e:
+        print(f"❌ Hestia info ETag error: {e}")
+        return False
+
+def test_firmware_status_publish():
+    """Test that a slow status stream subscriber still receives the latest state"""
+    try:
+        import queue
+        from app.routes import hestia_fw
+
+        subscriber = queue.Queue(maxsize=2)
+        with hestia_fw._subscribers_lock:
+            hestia_fw.progress_subscribers.append(subscriber)
+        saved = hestia_fw.status_snapshot()
+        try:
+            for progress in (10, 20, 30):
+                hestia_fw.publish({'progress': progress})
+            received = [subscriber.get_nowait()['progress'] for _ in range(subscriber.qsize())]
+            assert received == [20, 30], received
+        finally:
+            with hestia_fw._subscribers_lock:
+                hestia_fw.progress_subscribers.remove(subscriber)
+            hestia_fw.publish(saved)
+
+        print("✅ Firmware status publish keeps the latest state")
+        return True
+    except Exception as e:
+        print(f"❌ Firmware status publish error: {e}")
+        return False
+
 def main():
     """Run all tests"""
     print("🧪 Testing LoRa Setup Application...")
@@ -61,6 +361,17 @@ def main():
         ("Import Test", test_imports),
         ("App Creation Test", test_app_creation),
         ("Config Manager Test", test_config_manager),
+        ("fast_ini Round-Trip Test", test_fast_ini_round_trip),
+        ("Hestia Info Cache Test", test_hestia_info_cache),
+        ("Message Log Trim Test", test_message_log_trim),
+        ("Message Window Test", test_message_window_slide),
+        ("Upload Queue Test", test_upload_queue_cycle),
+        ("Queue Size Test", test_queue_size_external_append),
+        ("LoRa Device Numbering Test", test_lora_device_numbers),
+        ("LoRa Debounced Flush Test", test_lora_debounced_flush),
+        ("LoRa Config Copy Test", test_lora_config_copy),
+        ("Hestia Info ETag Test", test_hestia_info_etag),
+        ("Firmware Status Publish Test", test_firmware_status_publish),
     ]
     
     passed = 0